@@ -0,0 +1,224 @@
+"""
+Video Capture Pool
+Bounded LRU pool of open cv2.VideoCapture decoders shared by every segment.
+Segments reading the same file share one decoder; each segment's position is
+kept by the pool, so an evicted decoder resumes where it left off on reopen.
+"""
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+import cv2
+
+MAX_OPEN_DECODERS = 64
+
+
+class _Decoder:
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.cap = cv2.VideoCapture(path)
+        self.position = 0   # index of the frame the next read() returns
+        self.in_use = 0
+
+
+class VideoCapturePool:
+    def __init__(self, max_open: int = MAX_OPEN_DECODERS):
+        """
+        Args:
+            max_open: Cap on simultaneously open decoders (exceeded only while
+                      every open decoder is mid-read)
+        """
+        self.max_open = max(1, int(max_open))
+        self._lock = threading.Lock()
+        self._decoders: "OrderedDict[str, _Decoder]" = OrderedDict()
+        self._paths: Dict[str, str] = {}          # segment key -> video path
+        self._positions: Dict[str, int] = {}      # segment key -> next frame index
+        self._frame_counts: Dict[str, int] = {}   # video path -> total frames
+        self._unreadable = set()                  # paths that failed to open; never retried
+        self._key_ids = itertools.count()
+        self.opens = 0
+        self.evictions = 0
+        self.hits = 0
+        self.seeks = 0
+        self.failures = 0
+
+    def new_key(self, path: str) -> str:
+        """Segment key unique within this pool, for a reader of `path`."""
+        return f"{path}#{next(self._key_ids)}"
+
+    def register(self, key: str, path: str) -> bool:
+        """
+        Attach a segment to a video file, starting at frame 0
+
+        Returns:
+            bool: True if the file can be opened
+        """
+        with self._lock:
+            self._paths[key] = path
+            self._positions.setdefault(key, 0)
+            if path in self._unreadable:
+                return False
+        dec = self._acquire(path)
+        try:
+            return dec.cap.isOpened()
+        finally:
+            self._release(dec)
+
+    def frame_count(self, key: str) -> int:
+        return self._frame_counts.get(self._paths[key], 1)
+
+    def position(self, key: str) -> int:
+        return self._positions.get(key, 0)
+
+    def _acquire(self, path: str) -> _Decoder:
+        evicted: List[_Decoder] = []
+        with self._lock:
+            dec = self._decoders.get(path)
+            if dec is not None:
+                self._decoders.move_to_end(path)
+                self.hits += 1
+            else:
+                dec = _Decoder(path)
+                self.opens += 1
+                if not dec.cap.isOpened():
+                    # Not pooled: an unreadable file must not take a decoder slot
+                    self.failures += 1
+                    self._unreadable.add(path)
+                    print(f"[WARN] Could not open video: {path}")
+                    dec.in_use += 1
+                    return dec
+                self._frame_counts[path] = int(dec.cap.get(cv2.CAP_PROP_FRAME_COUNT)) or 1
+                self._decoders[path] = dec
+                # Evict least recently used decoders that nobody is reading from
+                for other_path in list(self._decoders):
+                    if len(self._decoders) <= self.max_open:
+                        break
+                    other = self._decoders[other_path]
+                    if other is dec or other.in_use:
+                        continue
+                    del self._decoders[other_path]
+                    evicted.append(other)
+                    self.evictions += 1
+            dec.in_use += 1
+        for other in evicted:
+            with other.lock:
+                other.cap.release()
+        return dec
+
+    def _release(self, dec: _Decoder):
+        with self._lock:
+            dec.in_use -= 1
+
+    def read_next(self, key: str, step: int = 1):
+        """
+        Read the segment's current frame and advance it by `step`, looping at the end
+
+        Returns:
+            frame: OpenCV image frame, or None if the video cannot be read
+        """
+        path = self._paths[key]
+        if path in self._unreadable:
+            return None
+        dec = self._acquire(path)
+        try:
+            with dec.lock:
+                if not dec.cap.isOpened():
+                    return None
+                total = self._frame_counts.get(path, 1)
+                pos = self._positions.get(key, 0)
+                if dec.position != pos:
+                    dec.cap.set(cv2.CAP_PROP_POS_FRAMES, pos)
+                    self.seeks += 1
+                ret, frame = dec.cap.read()
+                if not ret:
+                    # loop
+                    pos = 0
+                    dec.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    self.seeks += 1
+                    ret, frame = dec.cap.read()
+                    if not ret:
+                        dec.position = -1
+                        return None
+                dec.position = pos + 1
+                self._positions[key] = (pos + max(1, step)) % total
+                return frame
+        finally:
+            self._release(dec)
+
+    def is_open(self, key: str) -> bool:
+        return self._paths.get(key) in self._decoders
+
+    def schedule(self, keys: Iterable[str]) -> List[str]:
+        """
+        Order segments to amortize reopen cost
+
+        Segments on already-open files go first, least recently used first, so
+        they are read before later reopens can evict them; the rest are grouped
+        by file so each reopened decoder serves all of its segments at once.
+        """
+        keys = list(keys)
+        with self._lock:
+            lru_rank = {path: i for i, path in enumerate(self._decoders)}
+        open_keys = [k for k in keys if self._paths.get(k) in lru_rank]
+        closed_keys = [k for k in keys if self._paths.get(k) not in lru_rank]
+        open_keys.sort(key=lambda k: (lru_rank[self._paths[k]], self._positions.get(k, 0)))
+        closed_keys.sort(key=lambda k: (self._paths.get(k, ''), self._positions.get(k, 0)))
+        return open_keys + closed_keys
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'open': len(self._decoders),
+                'max_open': self.max_open,
+                'segments': len(self._paths),
+                'opens': self.opens,
+                'evictions': self.evictions,
+                'hits': self.hits,
+                'seeks': self.seeks,
+                'failures': self.failures,
+            }
+
+    def forget(self, key: str, release: bool = False):
+        """
+        Detach a segment; its file's decoder stays pooled for other segments
+
+        Args:
+            release: Also close the file's decoder if no other segment reads it
+        """
+        dec = None
+        with self._lock:
+            path = self._paths.pop(key, None)
+            self._positions.pop(key, None)
+            if release and path is not None and path not in self._paths.values():
+                dec = self._decoders.get(path)
+                if dec is not None and not dec.in_use:
+                    del self._decoders[path]
+                else:
+                    dec = None
+        if dec is not None:
+            with dec.lock:
+                dec.cap.release()
+
+    def close(self):
+        """Release every open decoder."""
+        with self._lock:
+            decoders = list(self._decoders.values())
+            self._decoders.clear()
+        for dec in decoders:
+            with dec.lock:
+                dec.cap.release()
+
+
+_default_pool: Optional[VideoCapturePool] = None
+_default_pool_lock = threading.Lock()
+
+
+def default_pool() -> VideoCapturePool:
+    """Process-wide pool shared by all readers that are not given one explicitly."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = VideoCapturePool(MAX_OPEN_DECODERS)
+        return _default_pool
@@ -0,0 +1,115 @@
+"""
+Deadline-Aware Edge Scheduler
+Chooses which edges to analyse in a tick under a time budget. Edges are ranked
+by client route demand, staleness and how fast their counts are changing;
+whatever does not fit the budget is deferred to a later tick.
+"""
+import time
+from typing import Optional
+
+import numpy as np
+
+
+class DeadlineScheduler:
+    def __init__(self, n_edges: int, budget_seconds: float, tick_seconds: float,
+                 route_weight: float = 5.0, staleness_weight: float = 1.0, rate_weight: float = 2.0,
+                 demand_decay: float = 0.5, cost_smoothing: float = 0.7):
+        """
+        Args:
+            n_edges: Number of edges; edge ids index every array
+            budget_seconds: Analysis time allowed per tick
+            tick_seconds: Tick period, the unit staleness is measured in
+            route_weight: Priority of an edge on a route clients are asking for,
+                          scaled by its decayed request count (capped at 1)
+            staleness_weight: Priority per tick since the edge was last analysed
+            rate_weight: Priority per vehicle/tick of count trend (either direction)
+            demand_decay: Per-tick decay of route demand
+            cost_smoothing: EMA weight on the previous per-edge analysis cost
+        """
+        self.budget = budget_seconds
+        self.tick_seconds = tick_seconds
+        self.route_weight = route_weight
+        self.staleness_weight = staleness_weight
+        self.rate_weight = rate_weight
+        self.demand_decay = demand_decay
+        self.cost_smoothing = cost_smoothing
+
+        now = time.time()
+        self.last_analysed = np.full(n_edges, now, dtype=np.float64)
+        self.demand = np.zeros(n_edges, dtype=np.float64)
+        self.cost = np.zeros(n_edges, dtype=np.float64)      # estimated seconds per analysis
+        self.deferrals = np.zeros(n_edges, dtype=np.int64)   # cumulative
+        self.last_tick = {'analysed': 0, 'deferred': 0, 'elapsed_ms': 0.0, 'budget_ms': budget_seconds * 1000.0}
+
+    def note_route(self, edge_ids):
+        """Record that a client asked for a route over these edges."""
+        self.demand[np.asarray(edge_ids, dtype=np.int64)] += 1.0
+
+    def staleness(self, now: Optional[float] = None) -> np.ndarray:
+        return (time.time() if now is None else now) - self.last_analysed
+
+    def priority(self, candidates: np.ndarray, trend: np.ndarray, now: float) -> np.ndarray:
+        stale_ticks = (now - self.last_analysed[candidates]) / self.tick_seconds
+        return (self.route_weight * np.minimum(self.demand[candidates], 1.0)
+                + self.staleness_weight * stale_ticks
+                + self.rate_weight * np.abs(trend[candidates]))
+
+    def plan(self, candidates: np.ndarray, trend: np.ndarray, now: Optional[float] = None) -> np.ndarray:
+        """
+        Pick this tick's edges, highest priority first, within the budget
+
+        Args:
+            candidates: Edge ids that have a source to analyse
+            trend: Per-edge count trend (vehicles per tick)
+
+        Returns:
+            ndarray: Chosen edge ids in priority order (never empty if candidates exist)
+        """
+        candidates = np.asarray(candidates, dtype=np.int64)
+        if candidates.size == 0:
+            return candidates
+        now = time.time() if now is None else now
+        order = candidates[np.argsort(-self.priority(candidates, trend, now), kind='stable')]
+        return order[:self.fit(order, self.budget)]
+
+    def estimated_cost(self, edge_ids: np.ndarray) -> np.ndarray:
+        """Seconds per analysis; edges never timed assume the mean (or the whole budget if none are)."""
+        cost = self.cost[np.asarray(edge_ids, dtype=np.int64)]
+        known = self.cost[self.cost > 0]
+        return np.where(cost > 0, cost, known.mean() if known.size else self.budget)
+
+    def fit(self, edge_ids: np.ndarray, seconds: float) -> int:
+        """How many leading edges of `edge_ids` fit in `seconds` by estimated cost (at least one)."""
+        if len(edge_ids) == 0:
+            return 0
+        spent = np.cumsum(self.estimated_cost(edge_ids))
+        return max(1, int(np.searchsorted(spent, seconds, side='right')))
+
+    def record(self, edge_id: int, seconds: float, now: float):
+        """Record one completed analysis of an edge."""
+        a = self.cost_smoothing
+        prev = self.cost[edge_id]
+        self.cost[edge_id] = seconds if prev == 0.0 else a * prev + (1.0 - a) * seconds
+        self.last_analysed[edge_id] = now
+
+    def finish_tick(self, candidates: np.ndarray, analysed: np.ndarray, elapsed: float):
+        """Count deferrals for candidates not analysed and decay route demand."""
+        deferred = np.setdiff1d(np.asarray(candidates, dtype=np.int64), np.asarray(analysed, dtype=np.int64))
+        self.deferrals[deferred] += 1
+        self.demand *= self.demand_decay
+        self.demand[self.demand < 1e-3] = 0.0
+        self.last_tick = {
+            'analysed': int(len(analysed)),
+            'deferred': int(deferred.size),
+            'elapsed_ms': elapsed * 1000.0,
+            'budget_ms': self.budget * 1000.0,
+        }
+
+    def stats(self, now: Optional[float] = None) -> dict:
+        stale = self.staleness(now)
+        return {
+            'last_tick': self.last_tick,
+            'staleness_s': np.round(stale, 2).tolist(),
+            'max_staleness_s': float(stale.max()) if stale.size else 0.0,
+            'deferrals': self.deferrals.tolist(),
+        }
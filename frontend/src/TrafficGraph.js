@@ -22,14 +22,70 @@ const TrafficGraph = () => {
     }
   });
 
+  // Static topology from /api/graph_topology, fetched once; null until loaded,
+  // false when the backend only serves the legacy /api/graph_data payload
+  const topologyRef = useRef(null);
+
+  const fetchTopology = async (version) => {
+    // Keyed by version so a newer topology is never answered from the HTTP cache
+    const url = version ? `/api/graph_topology?v=${encodeURIComponent(version)}` : '/api/graph_topology';
+    const response = await fetch(url);
+    if (response.status === 404) {
+      topologyRef.current = false;
+      return;
+    }
+    if (!response.ok) {
+      throw new Error('Failed to fetch graph topology');
+    }
+    topologyRef.current = await response.json();
+  };
+
+  // Expand the compact per-tick arrays (indexed by edge id) into the node/edge shape used for rendering
+  const decodeGraphState = (topo, state) => ({
+    nodes: topo.nodes.map((id, i) => ({ id, label: id, x: topo.x[i], y: topo.y[i] })),
+    edges: topo.from.map((from, i) => ({
+      from: topo.nodes[from],
+      to: topo.nodes[topo.to[i]],
+      weight: state.w[i],
+      count: state.c[i],
+      label: String(state.c[i])
+    })),
+    best_route: state.r.map(i => topo.nodes[i]),
+    min_weight: state.min,
+    max_weight: state.max,
+    src: state.src,
+    dst: state.dst,
+    next_update: state.next
+  });
+
   const fetchGraphData = async () => {
     try {
       const qs = new URLSearchParams({ src: srcNode, dst: dstNode }).toString();
-      const response = await fetch(`/api/graph_data?${qs}`);
-      if (!response.ok) {
-        throw new Error('Failed to fetch graph data');
+      if (topologyRef.current === null) {
+        await fetchTopology();
+      }
+      let data;
+      if (topologyRef.current === false) {
+        const response = await fetch(`/api/graph_data?${qs}`);
+        if (!response.ok) {
+          throw new Error('Failed to fetch graph data');
+        }
+        data = await response.json();
+      } else {
+        const response = await fetch(`/api/graph_state?${qs}`);
+        if (!response.ok) {
+          throw new Error('Failed to fetch graph data');
+        }
+        const state = await response.json();
+        if (state.v !== topologyRef.current.v) {
+          await fetchTopology(state.v);
+          if (!topologyRef.current || topologyRef.current.v !== state.v) {
+            topologyRef.current = null;
+            throw new Error('Graph topology changed; retrying');
+          }
+        }
+        data = decodeGraphState(topologyRef.current, state);
       }
-      const data = await response.json();
       setGraphData(data);
       setLastUpdate(new Date().toLocaleTimeString());
       setNextUpdate(data.next_update || 60);
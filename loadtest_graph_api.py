@@ -0,0 +1,191 @@
+"""
+Graph API Load Test
+Starts the city backend on synthetic video sources and simulates N dashboards
+polling /api/graph_data, reporting throughput and latency percentiles as JSON.
+The backend runs in its own process so the pollers do not share its GIL.
+"""
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import random
+import threading
+import time
+import urllib.request
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+from werkzeug.serving import make_server
+
+import python_project_hybrid as backend
+
+
+class SyntheticSegment:
+    """Drop-in for VideoSegment that draws random vehicle-sized blobs instead of decoding video."""
+    def __init__(self, seed: int, width: int = 640, height: int = 360, max_vehicles: int = 12):
+        self.rng = np.random.default_rng(seed)
+        self.width = width
+        self.height = height
+        self.max_vehicles = max_vehicles
+
+    def get_next_frame(self):
+        frame = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        for _ in range(int(self.rng.integers(0, self.max_vehicles + 1))):
+            x = int(self.rng.integers(0, self.width - 40))
+            y = int(self.rng.integers(0, self.height - 30))
+            cv2.rectangle(frame, (x, y), (x + 40, y + 30), (255, 255, 255), -1)
+        return frame
+
+    def close(self):
+        pass
+
+
+class Poller(threading.Thread):
+    """One simulated dashboard polling a fixed src/dst on a fixed schedule."""
+    def __init__(self, base_url: str, src: str, dst: str, interval: float, stop: threading.Event):
+        super().__init__(daemon=True)
+        self.url = f"{base_url}/api/graph_data?src={src}&dst={dst}"
+        self.interval = interval
+        self.stop = stop
+        self.latencies: List[float] = []
+        self.errors = 0
+
+    def run(self):
+        next_at = time.perf_counter()
+        while not self.stop.is_set():
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(self.url, timeout=10) as resp:
+                    resp.read()
+                self.latencies.append(time.perf_counter() - start)
+            except Exception:
+                self.errors += 1
+            if self.interval > 0:
+                # Keep to the polling schedule rather than waiting a full interval after each reply
+                next_at += self.interval
+                self.stop.wait(max(0.0, next_at - time.perf_counter()))
+
+
+def run_phase(base_url: str, pairs: List[Tuple[str, str]], duration: float, interval: float) -> dict:
+    """Run one polling phase with a poller per src/dst pair and summarize it."""
+    stop = threading.Event()
+    pollers = [Poller(base_url, src, dst, interval, stop) for src, dst in pairs]
+    start = time.perf_counter()
+    for p in pollers:
+        p.start()
+    time.sleep(duration)
+    stop.set()
+    for p in pollers:
+        p.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([lat for p in pollers for lat in p.latencies]) * 1000.0
+    result = {
+        'clients': len(pollers),
+        'duration_s': elapsed,
+        'requests': int(latencies.size),
+        'errors': sum(p.errors for p in pollers),
+        'throughput_rps': latencies.size / elapsed if elapsed > 0 else 0.0,
+    }
+    if latencies.size:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        result['latency_ms'] = {
+            'mean': float(latencies.mean()),
+            'p50': float(p50),
+            'p95': float(p95),
+            'p99': float(p99),
+            'max': float(latencies.max()),
+        }
+    return result
+
+
+def serve_backend(conn, port: int, seed: int, route_workers: int):
+    """Backend process: serve the app, then start the workers or stop when told to over `conn`."""
+    # Per-request access logs would dominate the output and the client timings
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    backend.build_city_graph()
+    backend.start_route_workers(route_workers)
+    server = make_server('127.0.0.1', port, backend.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    conn.send((server.server_port, sorted(backend.G.nodes())))
+    while True:
+        command = conn.recv()
+        if command == 'start_workers':
+            start_workers(seed)
+            conn.send('ok')
+        elif command == 'stop':
+            break
+    server.shutdown()
+    backend.stop_route_workers()
+
+
+class BackendProcess:
+    """The backend served from a separate process, controlled over a pipe."""
+    def __init__(self, port: int, seed: int, route_workers: int):
+        ctx = mp.get_context('spawn')
+        self.conn, child_conn = ctx.Pipe()
+        # Not a daemon: it may start route-worker processes of its own
+        self.process = ctx.Process(target=serve_backend, args=(child_conn, port, seed, route_workers))
+        self.process.start()
+        port, self.nodes = self.conn.recv()
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    def start_workers(self):
+        self.conn.send('start_workers')
+        self.conn.recv()
+
+    def close(self):
+        self.conn.send('stop')
+        self.process.join(10)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+def start_workers(seed: int):
+    """Start the video and graph workers on one synthetic segment per edge."""
+    segments: Dict[Tuple[str, str], SyntheticSegment] = {
+        k: SyntheticSegment(seed + i) for i, k in enumerate(backend.EDGE_KEYS)
+    }
+    threading.Thread(target=backend.edges_video_update_worker, args=(segments,), daemon=True).start()
+    threading.Thread(target=backend.graph_update_worker, daemon=True).start()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load-test /api/graph_data with concurrent simulated dashboards')
+    parser.add_argument('--clients', type=int, default=20, help='number of concurrent pollers')
+    parser.add_argument('--duration', type=float, default=15.0, help='seconds per phase')
+    parser.add_argument('--interval', type=float, default=1.0, help='poll interval per client (0 = back-to-back)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--port', type=int, default=0, help='backend port (0 picks a free one)')
+    parser.add_argument('--route-workers', type=int, default=0,
+                        help='route-query worker processes (0 = route in the backend process)')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    args = parser.parse_args()
+
+    backend_process = BackendProcess(args.port, args.seed, args.route_workers)
+    base_url = backend_process.base_url
+
+    rng = random.Random(args.seed)
+    nodes = backend_process.nodes
+    pairs = [tuple(rng.sample(nodes, 2)) for _ in range(args.clients)]
+
+    print(f"Backend at {base_url}; {args.clients} clients, {args.duration:g}s per phase")
+    report = {
+        'clients': args.clients,
+        'interval_s': args.interval,
+        'seed': args.seed,
+        'route_workers': args.route_workers,
+        'phases': {},
+    }
+    # Workers cannot be stopped once started, so the idle phase runs first
+    report['phases']['workers_off'] = run_phase(base_url, pairs, args.duration, args.interval)
+    backend_process.start_workers()
+    report['phases']['workers_on'] = run_phase(base_url, pairs, args.duration, args.interval)
+    backend_process.close()
+
+    out = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(out)
+    print(out)
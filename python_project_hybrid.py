@@ -1,14 +1,28 @@
 import os
 import math
+import hashlib
+import itertools
+import multiprocessing as mp
 import threading
 import time
-from typing import Dict, Tuple, List
+from typing import Dict, Tuple, List, Optional
 
-import cv2
 import networkx as nx
+import numpy as np
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 
+from capture_pool import default_pool
+from edge_scheduler import DeadlineScheduler
+from edge_smoothing import EdgeSmoother
+from route_cache import RouteCache
+from route_workers import RouteWorkerPool, SharedGraph
+from signal_timing import SignalPlanner
+from time_dependent_routing import TimeBucketedWeights, build_adjacency
+from traffic_core import (CITY_FRAME_INTERVALS, VideoSegment, build_city_grid, count_vehicles_from_frame,
+                          edge_key, schedule_segments)
+from wire_format import encode_response
+
 # ------------------------------
 # Config
 # ------------------------------
@@ -16,137 +30,125 @@ VIDEO_PATH = os.path.join('slow.mp4')
 FRAME_SKIP = 2           # process every Nth frame for efficiency
 SMOOTHING = 0.6          # EMA smoothing factor for flow
 REFRESH_SECONDS = 2      # API update frequency (match traffic_project_hybrid)
+TICK_BUDGET_SECONDS = 1.5  # frame analysis time per tick; lower-priority edges are deferred
 
 ALPHA_LENGTH = 0.3       # weight factor for road length cost
 BETA_FLOW = 1.0          # weight factor for dynamic flow cost
 
+TREND_SMOOTHING = 0.3    # Holt trend smoothing factor for the forecast
+FORECAST_HORIZON = 3     # forecast horizon in ticks (REFRESH_SECONDS each)
+FORECAST_WEIGHT = 0.0    # share of BETA_FLOW given to forecast vs current flow
+
+TOPOLOGY_MAX_AGE = 86400 # seconds clients may cache /api/graph_topology
+
+HISTORY_BUCKET_SECONDS = 900   # time-of-day bucket width for historical weights
+HISTORY_REBUILD_SECONDS = 60   # how often new history is folded into the tables
+SECONDS_PER_WEIGHT = 60.0      # travel time per unit of edge weight (depart_at routing)
+MAX_DEPART_AHEAD = 366 * 86400 # latest accepted depart_at, in seconds from now
+
+SIGNAL_MIN_GREEN = 7     # seconds
+SIGNAL_MAX_GREEN = 60    # seconds
+SIGNAL_MIN_CYCLE = 30    # seconds
+SIGNAL_MAX_CYCLE = 150   # seconds
+SIGNAL_LOST_TIME = 4     # start-up + clearance seconds lost per phase
+SATURATION_FLOW = 0.5    # vehicles discharged per second of green
+
+# Route-query worker processes over the shared-memory graph (0 = route in-process).
+# Off by default: on the 30-junction city graph the IPC costs more than Dijkstra.
+ROUTE_WORKERS = 0
+ROUTE_QUERY_TIMEOUT = 2.0  # seconds to wait on a worker before routing in-process
+
+# Edge weight added by an active incident, by severity (closures block the edge)
+INCIDENT_PENALTY = {'low': 5.0, 'medium': 15.0, 'high': 40.0}
+
 # ------------------------------
 # Global state guarded by lock
 # ------------------------------
 _state_lock = threading.Lock()
-# Per-edge dynamic flow (vehicles) estimated from video frames
-_edge_flow: Dict[Tuple[str, str], float] = {}
-_edge_ema: Dict[Tuple[str, str], float] = {}
-_edge_last_count: Dict[Tuple[str, str], int] = {}
+# Per-edge dynamic flow (vehicles) estimated from video frames, held in
+# arrays indexed by edge id (see EDGE_INDEX)
+_smoother = EdgeSmoother(0)
 
 # The city graph (30 junctions)
 G = nx.Graph()
 NODE_POS: Dict[str, Tuple[int, int]] = {}
+EDGE_KEYS: List[Tuple[str, str]] = []     # edge id -> edge key, in G.edges() order
+EDGE_INDEX: Dict[Tuple[str, str], int] = {}
+EDGE_LENGTH = np.zeros(0)
+NODE_INDEX: Dict[str, int] = {}
+# Static topology payload, built once with the graph and identified by its hash
+TOPOLOGY: Dict[str, list] = {}
+TOPOLOGY_VERSION = ''
+# CSR adjacency over node/edge ids and per time-of-day weight tables
+ADJACENCY: Tuple[np.ndarray, np.ndarray, np.ndarray] = (np.zeros(1, dtype=np.int64),) * 3
+_history = TimeBucketedWeights(np.zeros(0))
+# Signal timings for every junction, recomputed each tick from approach counts
+_signal_planner = SignalPlanner(0, [], [])
+_signal_plan: Dict[str, object] = {}
+# Picks which edges to analyse each tick within TICK_BUDGET_SECONDS
+_scheduler = DeadlineScheduler(0, TICK_BUDGET_SECONDS, REFRESH_SECONDS)
+
+# Incidents and the live edge penalties they impose. _graph_lock guards _incidents
+# and the weights written into G so tick updates and incident changes do not interleave.
+_graph_lock = threading.Lock()
+_incidents: Dict[int, dict] = {}
+_incident_ids = itertools.count(1)
+_edge_base_weight = np.zeros(0)
+_edge_penalty = np.zeros(0)
+_edge_closed = np.zeros(0, dtype=bool)
+
+# Topology and live weights in shared memory, and the processes routing over them
+_shared_graph: Optional[SharedGraph] = None
+_route_pool: Optional[RouteWorkerPool] = None
 
 # ------------------------------
-# Utilities
-# ------------------------------
-
-def edge_key(a: str, b: str) -> Tuple[str, str]:
-    return (a, b) if a <= b else (b, a)
-
-
-# ------------------------------
-# Build a city-like 6x5 grid (cols x rows = 30 nodes),
-# add arterials (long diagonals), and unequal road lengths.
+# City graph and its derived per-edge state
 # ------------------------------
 
 def build_city_graph():
-    cols, rows = 6, 5  # 6 columns, 5 rows = 30 nodes
-    spacing_x, spacing_y = 220, 180
-
-    # Create nodes with positions (x,y) for frontend placement
-    for r in range(rows):
-        for c in range(cols):
-            idx = r * cols + c + 1
-            nid = f"J{idx}"
-            # Stagger some rows slightly for a city-like irregular feel
-            jitter_x = (r % 2) * 40
-            jitter_y = (c % 2) * 20
-            x = c * spacing_x + jitter_x
-            y = r * spacing_y + jitter_y
-            G.add_node(nid)
-            NODE_POS[nid] = (x, y)
-
-    # Helper to compute Euclidean length between nodes
-    def length(a: str, b: str) -> float:
-        (x1, y1), (x2, y2) = NODE_POS[a], NODE_POS[b]
-        return math.hypot(x2 - x1, y2 - y1) / 100.0  # scaled to ~road km units
-
-    # Grid connections (horizontal and vertical)
-    for r in range(rows):
-        for c in range(cols):
-            idx = r * cols + c + 1
-            nid = f"J{idx}"
-            # connect right neighbor
-            if c < cols - 1:
-                right = f"J{idx + 1}"
-                G.add_edge(nid, right, length=length(nid, right))
-            # connect down neighbor
-            if r < rows - 1:
-                down = f"J{idx + cols}"
-                G.add_edge(nid, down, length=length(nid, down))
-
-    # Add a few diagonals / ring roads (arterials)
-    arterials = [
-        ('J1', 'J7'), ('J2', 'J8'), ('J3', 'J9'), ('J4', 'J10'),
-        ('J5', 'J11'), ('J6', 'J12'),  # vertical arterials spanning two rows
-        ('J7', 'J19'), ('J12', 'J24'), # long vertical jumps
-        ('J1', 'J12'), ('J6', 'J17'),  # diagonals across grid
-        ('J10', 'J21'), ('J15', 'J26'),
-        ('J5', 'J18'), ('J13', 'J30'),
-    ]
-    for a, b in arterials:
-        if a in G and b in G:
-            G.add_edge(a, b, length=length(a, b))
+    build_city_grid(G, NODE_POS)
 
     # Initialize dynamic attrs (flow will be filled by video worker)
-    for u, v in G.edges():
-        L = G[u][v]['length']
-        _edge_flow[edge_key(u, v)] = 5.0  # initial guess
-        _edge_ema[edge_key(u, v)] = 5.0
-        _edge_last_count[edge_key(u, v)] = 0
-        G[u][v]['weight'] = ALPHA_LENGTH * L + BETA_FLOW * _edge_flow[edge_key(u, v)]
-
-
-class VideoSegment:
-    """Independent reader for a shared video file with a custom frame interval."""
-    def __init__(self, video_path: str, frame_interval: int):
-        self.video_path = video_path
-        self.frame_interval = max(1, int(frame_interval))
-        self.cap = cv2.VideoCapture(video_path)
-        if not self.cap.isOpened():
-            print(f"[WARN] Could not open video: {video_path}")
-        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)) or 1
-        self.current_frame = 0
-
-    def get_next_frame(self):
-        if not self.cap.isOpened():
-            return None
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.current_frame)
-        ret, frame = self.cap.read()
-        if not ret:
-            # loop
-            self.current_frame = 0
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            ret, frame = self.cap.read()
-            if not ret:
-                return None
-        self.current_frame = (self.current_frame + self.frame_interval) % self.total_frames
-        return frame
-
-    def close(self):
-        try:
-            self.cap.release()
-        except Exception:
-            pass
-
+    global _smoother, _history, _scheduler, EDGE_LENGTH, _edge_base_weight, _edge_penalty, _edge_closed
+    EDGE_KEYS[:] = [edge_key(u, v) for u, v in G.edges()]
+    EDGE_INDEX.clear()
+    EDGE_INDEX.update({k: i for i, k in enumerate(EDGE_KEYS)})
+    EDGE_LENGTH = np.array([d['length'] for _, _, d in G.edges(data=True)])
+    _smoother = EdgeSmoother(len(EDGE_KEYS), SMOOTHING, TREND_SMOOTHING, FORECAST_HORIZON, initial=5.0)
+    _history = TimeBucketedWeights(ALPHA_LENGTH * EDGE_LENGTH + BETA_FLOW * 5.0, HISTORY_BUCKET_SECONDS)
+    _scheduler = DeadlineScheduler(len(EDGE_KEYS), TICK_BUDGET_SECONDS, REFRESH_SECONDS)
+    _edge_base_weight = np.zeros(len(EDGE_KEYS))
+    _edge_penalty = np.zeros(len(EDGE_KEYS))
+    _edge_closed = np.zeros(len(EDGE_KEYS), dtype=bool)
+    update_graph_weights()
+    build_topology()
+
+
+def build_topology():
+    """Build the static part of the graph payload as parallel arrays indexed by node/edge id."""
+    global TOPOLOGY_VERSION
+    nodes = list(G.nodes())
+    NODE_INDEX.clear()
+    NODE_INDEX.update({n: i for i, n in enumerate(nodes)})
+    TOPOLOGY.clear()
+    TOPOLOGY.update({
+        'nodes': nodes,
+        'x': [NODE_POS[n][0] for n in nodes],
+        'y': [NODE_POS[n][1] for n in nodes],
+        'from': [NODE_INDEX[u] for u, _ in G.edges()],
+        'to': [NODE_INDEX[v] for _, v in G.edges()],
+        'len': [round(L, 3) for L in EDGE_LENGTH.tolist()],
+    })
+    digest = hashlib.sha1(repr(sorted(TOPOLOGY.items())).encode('utf-8')).hexdigest()
+    TOPOLOGY_VERSION = digest[:12]
+    TOPOLOGY['v'] = TOPOLOGY_VERSION
 
-def count_vehicles_from_frame(frame) -> int:
-    """Count vehicles from a frame using edge detection"""
-    if frame is None:
-        return 0
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    blur = cv2.GaussianBlur(gray, (7, 7), 0)
-    edges = cv2.Canny(blur, 80, 200)
-    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    vehicles = [cnt for cnt in contours if cv2.contourArea(cnt) > 400]
-    return len(vehicles)
+    global ADJACENCY, _signal_planner
+    ADJACENCY = build_adjacency(len(nodes), TOPOLOGY['from'], TOPOLOGY['to'])
+    _signal_planner = SignalPlanner(len(nodes), TOPOLOGY['from'], TOPOLOGY['to'],
+                                    SIGNAL_MIN_GREEN, SIGNAL_MAX_GREEN, SIGNAL_MIN_CYCLE,
+                                    SIGNAL_MAX_CYCLE, SIGNAL_LOST_TIME, SATURATION_FLOW)
+    update_signal_plan()
 
 
 # ------------------------------
@@ -155,46 +157,235 @@ def count_vehicles_from_frame(frame) -> int:
 
 def edges_video_update_worker(segments: Dict[Tuple[str, str], VideoSegment]):
     """Update per-edge vehicle flow by reading frames with per-edge intervals."""
-    # initialize EMAs
-    for k in segments.keys():
-        _edge_ema.setdefault(k, 5.0)
-        _edge_flow.setdefault(k, 5.0)
+    keys_by_id = {EDGE_INDEX[k]: k for k in segments}
+    candidates = np.array(sorted(keys_by_id), dtype=np.int64)
 
     while True:
-        for k, seg in segments.items():
-            frame = seg.get_next_frame()
-            count = count_vehicles_from_frame(frame)
-            # EMA smoothing
-            prev = _edge_ema.get(k, 5.0)
-            ema = SMOOTHING * prev + (1.0 - SMOOTHING) * count
-            with _state_lock:
-                _edge_ema[k] = ema
-                _edge_flow[k] = max(0.0, float(ema))
-                _edge_last_count[k] = int(count)
-        time.sleep(REFRESH_SECONDS)
+        tick_start = time.perf_counter()
+        deadline = tick_start + TICK_BUDGET_SECONDS
+        with _state_lock:
+            trend = _smoother.trend.copy()
+        chosen = _scheduler.plan(candidates, trend)
+        analysed, counts = [], []
+        # Take edges in priority order, as many at a time as are estimated to fit
+        # the time left, and read each batch in decoder-friendly order. Anything
+        # past the deadline is therefore always the lowest-priority tail.
+        done = 0
+        while done < len(chosen):
+            left = deadline - time.perf_counter()
+            if analysed and left <= 0:
+                break
+            batch = chosen[done:done + _scheduler.fit(chosen[done:], left)].tolist()
+            done += len(batch)
+            for k in schedule_segments({keys_by_id[eid]: segments[keys_by_id[eid]] for eid in batch}):
+                start = time.perf_counter()
+                counts.append(count_vehicles_from_frame(segments[k].get_next_frame()))
+                _scheduler.record(EDGE_INDEX[k], time.perf_counter() - start, time.time())
+                analysed.append(EDGE_INDEX[k])
+        apply_edge_counts(np.array(analysed, dtype=np.int64), np.array(counts))
+
+        elapsed = time.perf_counter() - tick_start
+        _scheduler.finish_tick(candidates, analysed, elapsed)
+        time.sleep(max(0.0, REFRESH_SECONDS - elapsed))
+
+
+def apply_edge_counts(index: np.ndarray, counts: np.ndarray):
+    """Fold one tick of observed counts (edge ids in `index`) into the smoothed flow."""
+    with _state_lock:
+        _smoother.update(counts, index)
+
+
+def update_graph_weights(now: Optional[float] = None):
+    """
+    Recompute every edge weight from its length and current smoothed flow
+
+    When `now` is given, the weights are also recorded in the time-of-day
+    history used by depart_at routing. Incident penalties are added on top
+    of the live weights only.
+    """
+    global _edge_base_weight
+    # Combined cost: length + per-edge dynamic flow (optionally forecast-blended)
+    with _state_lock:
+        weights = ALPHA_LENGTH * EDGE_LENGTH + BETA_FLOW * _smoother.cost(FORECAST_WEIGHT)
+    with _graph_lock:
+        _edge_base_weight = weights
+        live = (weights + _edge_penalty).tolist()
+        closed = _edge_closed.tolist()
+        for w, c, (_, _, d) in zip(live, closed, G.edges(data=True)):
+            d['weight'] = w
+            d['closed'] = c
+        _publish_shared_weights()
+        # Every weight moved, so no cached route can be trusted
+        _route_cache.clear()
+    if now is not None:
+        _history.observe(weights, now)
+
+
+def _publish_shared_weights():
+    # Caller holds _graph_lock, so publishes never overlap
+    if _shared_graph is not None:
+        _shared_graph.publish(_edge_base_weight + _edge_penalty, _edge_closed)
+
+
+def update_signal_plan():
+    """Recompute green splits and cycle lengths for all junctions from the latest counts."""
+    global _signal_plan
+    start = time.perf_counter()
+    with _state_lock:
+        counts = _smoother.last_count.copy()
+    plan = _signal_planner.optimize(counts)
+    _signal_plan = {
+        'v': TOPOLOGY_VERSION,
+        'updated': time.time(),
+        'compute_ms': (time.perf_counter() - start) * 1000.0,
+        'cycle': np.round(plan['cycle'], 1).tolist(),
+        'approach': _signal_planner.approach.tolist(),
+        'green': np.round(plan['green'], 1).tolist(),
+        'queue': plan['queue'].astype(int).tolist(),
+    }
 
 
 def graph_update_worker():
     while True:
-        # Update each edge with combined cost: length + per-edge dynamic flow
-        for u, v, d in G.edges(data=True):
-            L = d.get('length', 1.0)
-            flow = _edge_flow.get(edge_key(u, v), 5.0)
-            d['weight'] = ALPHA_LENGTH * L + BETA_FLOW * flow
+        update_graph_weights(time.time())
+        update_signal_plan()
         time.sleep(REFRESH_SECONDS)
 
 
+def history_rebuild_worker():
+    """Fold newly observed ticks into the time-bucketed weight tables."""
+    while True:
+        time.sleep(HISTORY_REBUILD_SECONDS)
+        _history.rebuild()
+
+
 # ------------------------------
 # Flask API
 # ------------------------------
 app = Flask(__name__)
 CORS(app)
 
+
+def _route_weight(u, v, d):
+    # None hides closed edges from Dijkstra
+    return None if d.get('closed') else d['weight']
+
+
+def compute_route(src: str, dst: str) -> Tuple[List[str], List[int], float]:
+    """Least-cost route with the edge ids it crosses and its cost ([], [], inf if none)."""
+    pool = _route_pool
+    if pool is not None:
+        if src not in NODE_INDEX or dst not in NODE_INDEX:
+            return [], [], float('inf')
+        try:
+            path, edge_ids, cost, _ = pool.route(NODE_INDEX[src], NODE_INDEX[dst], ROUTE_QUERY_TIMEOUT)
+        except mp.TimeoutError:
+            # A worker that dies mid-query never answers; route here instead
+            print(f"[WARN] Route worker timed out for {src}->{dst}; routing in-process")
+        except ValueError:
+            # stop_route_workers() closed the pool under us
+            pass
+        else:
+            nodes = TOPOLOGY['nodes']
+            return [nodes[i] for i in path], edge_ids, cost
+    try:
+        if src not in G or dst not in G:
+            raise nx.NodeNotFound("invalid src/dst")
+        cost, path = nx.single_source_dijkstra(G, src, dst, weight=_route_weight)
+    except Exception:
+        return [], [], float('inf')
+    return path, [EDGE_INDEX[edge_key(a, b)] for a, b in zip(path, path[1:])], cost
+
+
+_route_cache = RouteCache(compute_route)
+
+
+def start_route_workers(processes: int = ROUTE_WORKERS):
+    """Publish the graph to shared memory and answer route queries from worker processes."""
+    global _shared_graph, _route_pool
+    if processes <= 0 or _route_pool is not None:
+        return
+    with _graph_lock:
+        _shared_graph = SharedGraph(ADJACENCY, len(EDGE_KEYS))
+        _publish_shared_weights()
+    _route_pool = RouteWorkerPool(_shared_graph, processes)
+    _route_cache.clear()
+
+
+def stop_route_workers():
+    """Stop the worker processes and release the shared graph; routing falls back in-process."""
+    global _shared_graph, _route_pool
+    if _route_pool is None:
+        return
+    pool, _route_pool = _route_pool, None
+    pool.close()
+    with _graph_lock:
+        graph, _shared_graph = _shared_graph, None
+    graph.close()
+    _route_cache.clear()
+
+
+def best_route(src: str, dst: str) -> List[str]:
+    """Least-cost route between two junctions on the current weights ([] if none)."""
+    path, edge_ids, _ = _route_cache.lookup(src, dst)
+    # Edges on routes clients are asking for get analysed first
+    _scheduler.note_route(edge_ids)
+    return path
+
+
+def timed_route(src: str, dst: str, depart_at: float) -> Tuple[List[str], Optional[float]]:
+    """Least-cost route for a departure at `depart_at`, using historical weights per time bucket."""
+    if src not in NODE_INDEX or dst not in NODE_INDEX:
+        return [], None
+    path, arrive_at = _history.shortest_path(ADJACENCY, NODE_INDEX[src], NODE_INDEX[dst],
+                                             depart_at, SECONDS_PER_WEIGHT)
+    if not path:
+        return [], None
+    nodes = TOPOLOGY['nodes']
+    return [nodes[i] for i in path], arrive_at
+
+
+def parse_depart_at(value: Optional[str]) -> Optional[float]:
+    """Parse `depart_at` as epoch seconds or local 'HH:MM' (next occurrence); ValueError if invalid."""
+    if not value:
+        return None
+    now = time.time()
+    if ':' in value:
+        hh, mm = (int(part) for part in value.split(':', 1))
+        if not (0 <= hh <= 23 and 0 <= mm <= 59):
+            raise ValueError(f"depart_at out of range: {value}")
+        lt = time.localtime(now)
+        t = time.mktime((lt.tm_year, lt.tm_mon, lt.tm_mday, hh, mm, 0, 0, 0, -1))
+        return t + 86400 if t < now else t
+    t = float(value)
+    if not (math.isfinite(t) and 0 <= t <= now + MAX_DEPART_AHEAD):
+        raise ValueError(f"depart_at out of range: {value}")
+    return t
+
+
+def route_for_request(src: str, dst: str):
+    """
+    Route for the current request's optional depart_at
+
+    Returns:
+        tuple: (route, depart_at, arrive_at); times are None for live routing
+    """
+    depart_at = parse_depart_at(request.args.get('depart_at'))
+    if depart_at is None:
+        return best_route(src, dst), None, None
+    route, arrive_at = timed_route(src, dst, depart_at)
+    return route, depart_at, arrive_at
+
+
 @app.route('/api/graph_data')
 def api_graph_data():
-    # Read optional source/target from query
+    # Read optional source/target (and departure time) from query
     src = request.args.get('src', 'J1')
     dst = request.args.get('dst', 'J30')
+    try:
+        route, depart_at, arrive_at = route_for_request(src, dst)
+    except ValueError:
+        return jsonify({'error': 'depart_at must be epoch seconds or HH:MM'}), 400
     # Compute min/max for frontend normalization
     weights: List[float] = [d['weight'] for _, _, d in G.edges(data=True)]
     min_w = min(weights) if weights else 0.0
@@ -209,44 +400,240 @@ def api_graph_data():
     } for n in G.nodes()]
 
     edges = []
-    for u, v, d in G.edges(data=True):
-        k = edge_key(u, v)
+    counts = _smoother.last_count.tolist()
+    for i, (u, v, d) in enumerate(G.edges(data=True)):
         edges.append({
             'from': u,
             'to': v,
             'weight': float(d['weight']),
-            'count': int(_edge_last_count.get(k, 0)),
-            'label': str(int(_edge_last_count.get(k, 0)))
+            'count': counts[i],
+            'label': str(counts[i])
         })
 
-    # Compute best route between requested src and dst
-    try:
-        if src not in G or dst not in G:
-            raise nx.NodeNotFound("invalid src/dst")
-        best_route = nx.shortest_path(G, source=src, target=dst, weight='weight')
-    except Exception:
-        best_route = []
-
-    return jsonify({
+    payload = {
         'nodes': nodes,
         'edges': edges,
-        'best_route': best_route,
+        'best_route': route,
         'min_weight': float(min_w),
         'max_weight': float(max_w),
         'src': src,
         'dst': dst,
         'next_update': REFRESH_SECONDS
+    }
+    if depart_at is not None:
+        payload['depart_at'] = depart_at
+        payload['arrive_at'] = arrive_at
+    return jsonify(payload)
+
+
+# ------------------------------
+# Incidents
+# ------------------------------
+
+def _routes_improved_by(u: str, v: str, w: float) -> set:
+    """Cached routes that would get cheaper by using edge (u, v) at weight `w`."""
+    costs = _route_cache.costs()
+    if not costs:
+        return set()
+    inf = float('inf')
+    du = nx.single_source_dijkstra_path_length(G, u, weight=_route_weight)
+    dv = nx.single_source_dijkstra_path_length(G, v, weight=_route_weight)
+    improved = set()
+    for (s, t), cost in costs.items():
+        via = min(du.get(s, inf) + w + dv.get(t, inf), dv.get(s, inf) + w + du.get(t, inf))
+        if via < cost - 1e-9:
+            improved.add((s, t))
+    return improved
+
+
+def apply_edge_incidents(incident: dict) -> int:
+    """
+    Store `incident`, re-derive its edge's penalty from the active incidents and reroute
+
+    Only cached routes the change can affect are recomputed: routes crossing
+    the edge when it got worse, and routes the edge could now shorten when
+    it got better. Returns the number of routes recomputed.
+    """
+    eid = incident['edge']
+    u, v = EDGE_KEYS[eid]
+    # One critical section from storing the incident to writing the weight, so
+    # concurrent changes on an edge cannot leave an older penalty in place
+    with _graph_lock:
+        _incidents[incident['id']] = incident
+        active = [i for i in _incidents.values() if i['edge'] == eid and i['status'] != 'resolved']
+        penalty = float(sum(i['penalty'] for i in active))
+        closed = any(i['closed'] for i in active)
+        old_penalty, old_closed = float(_edge_penalty[eid]), bool(_edge_closed[eid])
+        _edge_penalty[eid] = penalty
+        _edge_closed[eid] = closed
+        G[u][v]['weight'] = float(_edge_base_weight[eid]) + penalty
+        G[u][v]['closed'] = closed
+        _publish_shared_weights()
+        # Routes still being computed on the old weights must not be cached
+        _route_cache.invalidate()
+        weight = G[u][v]['weight']
+
+    affected = set()
+    if penalty > old_penalty or (closed and not old_closed):
+        affected |= _route_cache.routes_crossing([eid])
+    if not closed and (penalty < old_penalty or old_closed):
+        affected |= _routes_improved_by(u, v, weight)
+    return _route_cache.recompute(affected)
+
+
+@app.route('/api/incidents')
+def api_incidents():
+    with _graph_lock:
+        incidents = list(_incidents.values())
+    return jsonify(incidents)
+
+
+def parse_penalty(value) -> float:
+    """Incident penalty as a finite, non-negative edge weight."""
+    try:
+        penalty = float(value) if not isinstance(value, bool) else math.nan
+    except (TypeError, ValueError):
+        penalty = math.nan
+    if not math.isfinite(penalty) or penalty < 0:
+        raise ValueError('penalty must be a finite number >= 0')
+    return penalty
+
+
+def parse_closed(value) -> bool:
+    """Strict boolean for `closed` (JSON true/false, or the strings 'true'/'false')."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in ('true', 'false'):
+        return value.lower() == 'true'
+    raise ValueError('closed must be true or false')
+
+
+@app.route('/api/incident', methods=['POST'])
+def api_create_incident():
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        return jsonify({'error': 'body must be a JSON object'}), 400
+    k = edge_key(str(body.get('from', '')), str(body.get('to', '')))
+    if k not in EDGE_INDEX:
+        return jsonify({'error': 'from/to must name an existing road'}), 400
+    severity = body.get('severity', 'medium')
+    if severity not in INCIDENT_PENALTY:
+        return jsonify({'error': f"severity must be one of {', '.join(INCIDENT_PENALTY)}"}), 400
+    try:
+        penalty = parse_penalty(body.get('penalty', INCIDENT_PENALTY[severity]))
+        closed = parse_closed(body.get('closed', False))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    incident = {
+        'id': next(_incident_ids),
+        'edge': EDGE_INDEX[k],
+        'from': k[0],
+        'to': k[1],
+        'type': body.get('type', 'other'),
+        'severity': severity,
+        'penalty': penalty,
+        'closed': closed,
+        'location': body.get('location'),
+        'reported_by': body.get('reported_by'),
+        'status': 'reported',
+        'reported_at': time.time(),
+    }
+    rerouted = apply_edge_incidents(incident)
+    return jsonify({
+        'id': incident['id'],
+        'status': incident['status'],
+        'message': 'Incident created successfully',
+        'rerouted': rerouted
+    }), 201
+
+
+@app.route('/api/incident/<int:incident_id>', methods=['PUT'])
+def api_update_incident(incident_id):
+    incident = _incidents.get(incident_id)
+    if incident is None:
+        return jsonify({'error': 'incident not found'}), 404
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        return jsonify({'error': 'body must be a JSON object'}), 400
+    status = body.get('status', incident['status'])
+    if status not in ('reported', 'acknowledged', 'resolved'):
+        return jsonify({'error': 'status must be reported, acknowledged or resolved'}), 400
+    try:
+        penalty = parse_penalty(body['penalty']) if 'penalty' in body else incident['penalty']
+        closed = parse_closed(body['closed']) if 'closed' in body else incident['closed']
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    # Replaced whole rather than edited in place, so readers never see a half-updated incident
+    rerouted = apply_edge_incidents(dict(incident, status=status, penalty=penalty, closed=closed))
+    return jsonify({'id': incident_id, 'status': status, 'rerouted': rerouted})
+
+
+@app.route('/api/signals')
+def api_signals():
+    """Latest signal plan as arrays indexed by junction (node id in /api/graph_topology)."""
+    return encode_response(_signal_plan, cache_control='no-cache')
+
+
+@app.route('/api/metrics')
+def api_metrics():
+    with _graph_lock:
+        active = sum(1 for i in _incidents.values() if i['status'] != 'resolved')
+    return jsonify({
+        'decoders': default_pool().stats(),
+        'routes': _route_cache.stats(),
+        'edges': _scheduler.stats(),
+        'route_workers': dict(_route_pool.stats(), version=_shared_graph.version) if _route_pool else None,
+        'incidents': active
     })
 
 
+@app.route('/api/graph_topology')
+def api_graph_topology():
+    """Static nodes, positions and edge endpoints; cacheable until the topology changes."""
+    return encode_response(TOPOLOGY, cache_control=f'public, max-age={TOPOLOGY_MAX_AGE}',
+                           etag=TOPOLOGY_VERSION)
+
+
+@app.route('/api/graph_state')
+def api_graph_state():
+    """Per-tick weights and counts as arrays indexed by edge id (see /api/graph_topology)."""
+    src = request.args.get('src', 'J1')
+    dst = request.args.get('dst', 'J30')
+    try:
+        route, depart_at, arrive_at = route_for_request(src, dst)
+    except ValueError:
+        return jsonify({'error': 'depart_at must be epoch seconds or HH:MM'}), 400
+    weights = [round(d['weight'], 3) for _, _, d in G.edges(data=True)]
+    payload = {
+        'v': TOPOLOGY_VERSION,
+        'w': weights,
+        'c': _smoother.last_count.tolist(),
+        'r': [NODE_INDEX[n] for n in route],
+        'min': min(weights) if weights else 0.0,
+        'max': max(weights) if weights else 1.0,
+        'src': src,
+        'dst': dst,
+        'next': REFRESH_SECONDS
+    }
+    if depart_at is not None:
+        payload['dep'] = depart_at
+        payload['arr'] = arrive_at
+    return encode_response(payload, cache_control='no-cache')
+
+
 # ------------------------------
 # Entry point
 # ------------------------------
 if __name__ == '__main__':
     build_city_graph()
+    # The debug reloader also runs this block in its watcher process; only the
+    # serving child (WERKZEUG_RUN_MAIN set) gets route workers and shared memory
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_route_workers()
 
     # Create a per-edge video segment with different frame intervals
-    intervals = [5, 8, 10, 12, 15, 18, 20, 22, 25, 28, 30, 35,37,39,41,43,45,47,49]
+    intervals = CITY_FRAME_INTERVALS
     segments: Dict[Tuple[str, str], VideoSegment] = {}
     for i, (u, v) in enumerate(G.edges()):
         k = edge_key(u, v)
@@ -258,7 +645,9 @@ if __name__ == '__main__':
     # Start workers
     threading.Thread(target=edges_video_update_worker, args=(segments,), daemon=True).start()
     threading.Thread(target=graph_update_worker, daemon=True).start()
+    threading.Thread(target=history_rebuild_worker, daemon=True).start()
 
     print('Hybrid backend running at http://127.0.0.1:5000')
     print('Endpoint: GET /api/graph_data')
+    print('Endpoints: GET /api/graph_topology, GET /api/graph_state')
     app.run(host='127.0.0.1', port=5000, debug=True)
@@ -0,0 +1,269 @@
+"""
+Accelerated Traffic Replay
+Feeds recorded per-edge vehicle counts into the hybrid backend on a virtual clock
+so routing and the API can be load-tested without waiting in real time.
+"""
+import argparse
+import csv
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import python_project_hybrid as backend
+from time_dependent_routing import seconds_since_midnight
+
+MIN_SPEED = 1.0
+MAX_SPEED = 1000.0
+
+
+class ReplayClock:
+    """Virtual clock that runs `speed` times faster than wall time."""
+
+    def __init__(self, speed: float = 1.0, start: float = 0.0):
+        if not MIN_SPEED <= speed <= MAX_SPEED:
+            raise ValueError(f"speed must be between {MIN_SPEED:g}x and {MAX_SPEED:g}x, got {speed}")
+        self.speed = float(speed)
+        self.start = float(start)
+        self._virtual = float(start)
+        self._real_start = time.perf_counter()
+
+    def now(self) -> float:
+        """Current virtual time in seconds."""
+        return self._virtual
+
+    def advance(self, seconds: float):
+        """
+        Move virtual time forward and sleep until wall time catches up
+
+        Work done since the last call counts against the sleep, so the replay
+        holds its speed as long as a tick finishes inside its real-time slot.
+        """
+        self._virtual += seconds
+        deadline = self._real_start + (self._virtual - self.start) / self.speed
+        remaining = deadline - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+
+
+def load_count_series(csv_path: str) -> Dict[Tuple[str, str], List[int]]:
+    """
+    Load recorded per-edge counts for roads of the built city graph
+
+    Args:
+        csv_path: CSV with a `tick,from,to,count` header, one row per edge per tick
+
+    Returns:
+        dict: Mapping of edge keys to their count series, indexed by tick
+              (from the first tick in the file); -1 marks a tick with no sample
+
+    Raises:
+        ValueError: If the CSV names roads that are not in the graph
+    """
+    rows: Dict[Tuple[str, str], Dict[int, int]] = defaultdict(dict)
+    unknown = set()
+    with open(csv_path, newline='') as f:
+        for row in csv.DictReader(f):
+            k = backend.edge_key(row['from'], row['to'])
+            if k not in backend.EDGE_INDEX:
+                unknown.add((row['from'], row['to']))
+                continue
+            rows[k][int(row['tick'])] = int(row['count'])
+    if unknown:
+        pairs = ', '.join(f"{a}-{b}" for a, b in sorted(unknown))
+        raise ValueError(f"{csv_path} names roads not in the graph (from-to): {pairs}")
+
+    # Missing ticks stay in place as -1 so every edge stays aligned with the recording
+    first = min((min(by_tick) for by_tick in rows.values()), default=0)
+    series = {}
+    for k, by_tick in rows.items():
+        counts = [-1] * (max(by_tick) - first + 1)
+        for t, count in by_tick.items():
+            counts[t - first] = count
+        series[k] = counts
+    return series
+
+
+def synthetic_count_series(edges: List[Tuple[str, str]], ticks: int, seed: int = 0) -> Dict[Tuple[str, str], List[int]]:
+    """
+    Generate a day-shaped count series for every edge
+
+    Each edge gets its own base load and a morning/evening peak on top of
+    Poisson noise, all drawn from a single seeded generator.
+    """
+    rng = np.random.default_rng(seed)
+    ticks_per_day = max(1, int(24 * 3600 / backend.REFRESH_SECONDS))
+    hours = (np.arange(ticks) % ticks_per_day) * 24.0 / ticks_per_day
+    peaks = np.exp(-((hours - 8.5) ** 2) / 2.0) + np.exp(-((hours - 17.5) ** 2) / 2.5)
+
+    series = {}
+    for u, v in sorted(backend.edge_key(a, b) for a, b in edges):
+        base = rng.uniform(1.0, 6.0)
+        peak = rng.uniform(2.0, 12.0)
+        series[(u, v)] = rng.poisson(base + peak * peaks).astype(int).tolist()
+    return series
+
+
+def write_count_series(series: Dict[Tuple[str, str], List[int]], csv_path: str):
+    """Save a count series in the format read by `load_count_series`."""
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['tick', 'from', 'to', 'count'])
+        for (u, v), counts in series.items():
+            for tick, count in enumerate(counts):
+                if count >= 0:
+                    writer.writerow([tick, u, v, count])
+
+
+class TrafficReplayer:
+    """Replays a count series through the backend update path and records latency."""
+
+    def __init__(self, series: Dict[Tuple[str, str], List[int]], speed: float = 1.0, seed: int = 0,
+                 probe_routes: int = 5, api_every: int = 1):
+        """
+        Args:
+            series: Mapping of edge keys to per-tick vehicle counts
+            speed: Virtual clock multiplier (1x-1000x)
+            seed: Seed for picking probe routes and API query pairs
+            probe_routes: Number of src/dst pairs whose best route is tracked
+            api_every: Issue one `/api/graph_data` request every N ticks (0 disables)
+        """
+        self.series = series
+        # Virtual time starts at today's local midnight so ticks land in the
+        # matching time-of-day buckets of the weight history
+        now = time.time()
+        self.clock = ReplayClock(speed, start=now - seconds_since_midnight(now))
+        self.rng = random.Random(seed)
+        self.api_every = api_every
+        self.ticks = max((len(s) for s in series.values()), default=0)
+
+        # One (tick x edge) matrix so each tick is applied in a single vectorized step;
+        # -1 marks ticks past the end of a shorter series
+        self._index = np.array([backend.EDGE_INDEX[k] for k in series], dtype=np.int64)
+        self._counts = np.full((self.ticks, len(series)), -1, dtype=np.int64)
+        for j, counts in enumerate(series.values()):
+            self._counts[:len(counts), j] = counts
+
+        nodes = sorted(backend.G.nodes())
+        self.probes = [tuple(self.rng.sample(nodes, 2)) for _ in range(probe_routes)] if len(nodes) >= 2 else []
+        self._last_routes: Dict[Tuple[str, str], List[str]] = {}
+
+        self.tick_latency: List[float] = []
+        self.api_latency: List[float] = []
+        self.route_changes = 0
+        self.api_errors = 0
+
+    def _apply_tick(self, tick: int):
+        row = self._counts[tick]
+        present = row >= 0
+        backend.apply_edge_counts(self._index[present], row[present])
+        backend.update_graph_weights(self.clock.now())
+
+    def _track_routes(self):
+        for src, dst in self.probes:
+            route = backend.best_route(src, dst)
+            prev = self._last_routes.get((src, dst))
+            if prev is not None and prev != route:
+                self.route_changes += 1
+            self._last_routes[(src, dst)] = route
+
+    def _query_api(self, client):
+        src, dst = self.probes[self.rng.randrange(len(self.probes))]
+        start = time.perf_counter()
+        resp = client.get(f'/api/graph_data?src={src}&dst={dst}')
+        self.api_latency.append(time.perf_counter() - start)
+        if resp.status_code != 200:
+            self.api_errors += 1
+
+    def run(self, max_ticks: Optional[int] = None) -> dict:
+        """Replay the series (or its first `max_ticks` ticks) and return summary stats."""
+        ticks = self.ticks if max_ticks is None else min(self.ticks, max_ticks)
+        client = backend.app.test_client()
+        wall_start = time.perf_counter()
+
+        for tick in range(ticks):
+            start = time.perf_counter()
+            self._apply_tick(tick)
+            self.tick_latency.append(time.perf_counter() - start)
+
+            self._track_routes()
+            if self.api_every and self.probes and tick % self.api_every == 0:
+                self._query_api(client)
+            self.clock.advance(backend.REFRESH_SECONDS)
+
+        backend._history.rebuild()
+        return self.summary(ticks, time.perf_counter() - wall_start)
+
+    def summary(self, ticks: int, wall_seconds: float) -> dict:
+        virtual_seconds = self.clock.now() - self.clock.start
+        virtual_hours = virtual_seconds / 3600.0
+        return {
+            'ticks': ticks,
+            'speed': self.clock.speed,
+            'virtual_seconds': virtual_seconds,
+            'wall_seconds': wall_seconds,
+            'effective_speed': virtual_seconds / wall_seconds if wall_seconds > 0 else 0.0,
+            'tick_latency_ms': _latency_stats(self.tick_latency),
+            'api_latency_ms': _latency_stats(self.api_latency),
+            'api_requests': len(self.api_latency),
+            'api_errors': self.api_errors,
+            'probe_routes': [list(p) for p in self.probes],
+            'route_changes': self.route_changes,
+            'route_changes_per_hour': self.route_changes / virtual_hours if virtual_hours > 0 else 0.0,
+        }
+
+
+def _latency_stats(samples: List[float]) -> dict:
+    if not samples:
+        return {'count': 0}
+    ms = np.asarray(samples) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        'count': int(ms.size),
+        'mean': float(ms.mean()),
+        'p50': float(p50),
+        'p95': float(p95),
+        'p99': float(p99),
+        'max': float(ms.max()),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay recorded edge counts through the hybrid backend')
+    parser.add_argument('--series', help='CSV of recorded counts (tick,from,to,count); synthetic if omitted')
+    parser.add_argument('--speed', type=float, default=100.0, help='virtual clock speed, 1-1000x')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ticks', type=int, default=None, help='stop after this many ticks')
+    parser.add_argument('--hours', type=float, default=24.0, help='length of the synthetic series')
+    parser.add_argument('--probe-routes', type=int, default=5)
+    parser.add_argument('--api-every', type=int, default=1, help='query the API every N ticks (0 disables)')
+    parser.add_argument('--save-series', help='write the replayed series to this CSV')
+    parser.add_argument('--output', help='write the JSON summary to this file')
+    args = parser.parse_args()
+
+    backend.build_city_graph()
+
+    if args.series:
+        try:
+            series = load_count_series(args.series)
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        ticks = int(args.hours * 3600 / backend.REFRESH_SECONDS)
+        series = synthetic_count_series(list(backend.G.edges()), ticks, seed=args.seed)
+    if args.save_series:
+        write_count_series(series, args.save_series)
+
+    replayer = TrafficReplayer(series, speed=args.speed, seed=args.seed,
+                               probe_routes=args.probe_routes, api_every=args.api_every)
+    print(f"Replaying {replayer.ticks} ticks over {len(series)} edges at {args.speed:g}x...")
+    result = replayer.run(args.ticks)
+
+    report = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+    print(report)
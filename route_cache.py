@@ -0,0 +1,115 @@
+"""
+Route Cache
+Caches best routes per (src, dst) with a reverse index from edge id to the
+cached routes that cross it, so a change on one edge only recomputes the
+routes it can affect.
+"""
+import threading
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+RouteKey = Tuple[str, str]
+# compute(src, dst) -> (node path, edge ids along it, total cost)
+RouteFn = Callable[[str, str], Tuple[List[str], List[int], float]]
+
+
+class RouteCache:
+    def __init__(self, compute: RouteFn):
+        self._compute = compute
+        self._lock = threading.Lock()
+        self._routes: Dict[RouteKey, Tuple[List[str], List[int], float]] = {}
+        self._by_edge: Dict[int, Set[RouteKey]] = {}
+        # Bumped whenever weights change, so a route computed on older weights is not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.recomputed = 0
+        self.cleared = 0
+
+    def _store(self, key: RouteKey, entry: Tuple[List[str], List[int], float]):
+        self._unindex(key)
+        self._routes[key] = entry
+        for eid in entry[1]:
+            self._by_edge.setdefault(eid, set()).add(key)
+
+    def _unindex(self, key: RouteKey):
+        old = self._routes.pop(key, None)
+        if old is None:
+            return
+        for eid in old[1]:
+            keys = self._by_edge.get(eid)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_edge[eid]
+
+    def lookup(self, src: str, dst: str) -> Tuple[List[str], List[int], float]:
+        """Cached (path, edge ids, cost) for a route, computing it on a miss."""
+        key = (src, dst)
+        with self._lock:
+            entry = self._routes.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            generation = self._generation
+        entry = self._compute(src, dst)
+        with self._lock:
+            self.misses += 1
+            if generation == self._generation:
+                self._store(key, entry)
+        return entry
+
+    def get(self, src: str, dst: str) -> List[str]:
+        return self.lookup(src, dst)[0]
+
+    def costs(self) -> Dict[RouteKey, float]:
+        """Current cost of every cached route."""
+        with self._lock:
+            return {key: entry[2] for key, entry in self._routes.items()}
+
+    def recompute(self, keys: Iterable[RouteKey]) -> int:
+        """Recompute the given cached routes; returns how many were recomputed."""
+        keys = list(keys)
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        for src, dst in keys:
+            entry = self._compute(src, dst)
+            with self._lock:
+                # A clear() meanwhile means the weights moved again; drop the stale result
+                if generation != self._generation:
+                    break
+                self._store((src, dst), entry)
+        with self._lock:
+            self.recomputed += len(keys)
+        return len(keys)
+
+    def routes_crossing(self, edge_ids: Iterable[int]) -> Set[RouteKey]:
+        with self._lock:
+            keys: Set[RouteKey] = set()
+            for eid in edge_ids:
+                keys |= self._by_edge.get(eid, set())
+            return keys
+
+    def invalidate(self):
+        """Keep the cached routes but drop results of lookups already computing (weights moved)."""
+        with self._lock:
+            self._generation += 1
+
+    def clear(self):
+        """Drop every cached route (e.g. after a tick changed all weights)."""
+        with self._lock:
+            self._routes.clear()
+            self._by_edge.clear()
+            self._generation += 1
+            self.cleared += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'cached': len(self._routes),
+                'indexed_edges': len(self._by_edge),
+                'hits': self.hits,
+                'misses': self.misses,
+                'recomputed': self.recomputed,
+                'cleared': self.cleared,
+            }
@@ -0,0 +1,173 @@
+"""
+Route Workers
+Serves shortest-path queries from a pool of worker processes. The CSR topology
+and the live per-edge weights are published to multiprocessing.shared_memory;
+workers map them as NumPy arrays without copying, so routing runs on every core
+instead of competing with the ingest threads for the serving process's GIL.
+"""
+import heapq
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Header slots: seqlock counter (odd while weights are being written) and weights version
+_SEQ, _VERSION = 0, 1
+
+
+class SharedGraph:
+    def __init__(self, adjacency: Tuple[np.ndarray, np.ndarray, np.ndarray], n_edges: int):
+        """
+        Args:
+            adjacency: CSR (indptr, neighbors, edge_ids) as from build_adjacency
+            n_edges: Number of edges; edge ids index the weight array
+        """
+        indptr, neighbors, edge_ids = adjacency
+        self._blocks: Dict[str, Tuple[shared_memory.SharedMemory, tuple, str]] = {}
+        self.header = self._create('header', np.zeros(2, dtype=np.int64))
+        self.indptr = self._create('indptr', indptr)
+        self.neighbors = self._create('neighbors', neighbors)
+        self.edge_ids = self._create('edge_ids', edge_ids)
+        # Every edge is unreachable until the first publish
+        self.weights = self._create('weights', np.full(n_edges, np.inf))
+
+    def _create(self, key: str, data: np.ndarray) -> np.ndarray:
+        data = np.ascontiguousarray(data)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, data.nbytes))
+        view = np.ndarray(data.shape, dtype=data.dtype, buffer=shm.buf)
+        view[...] = data
+        self._blocks[key] = (shm, data.shape, data.dtype.str)
+        return view
+
+    def spec(self) -> Dict[str, Tuple[str, tuple, str]]:
+        """Block name, shape and dtype of each array, for attaching from another process."""
+        return {key: (shm.name, shape, dtype) for key, (shm, shape, dtype) in self._blocks.items()}
+
+    @property
+    def version(self) -> int:
+        return int(self.header[_VERSION])
+
+    def publish(self, weights: np.ndarray, closed: Optional[np.ndarray] = None) -> int:
+        """
+        Replace the live weights; closed edges become unreachable
+
+        Publishes must not run concurrently (callers serialize them). Readers
+        that overlap a publish see the counter change and retry.
+
+        Returns:
+            int: New weights version
+        """
+        weights = np.asarray(weights, dtype=np.float64)
+        if closed is not None:
+            weights = np.where(closed, np.inf, weights)
+        header = self.header
+        header[_SEQ] += 1
+        self.weights[:] = weights
+        header[_VERSION] += 1
+        header[_SEQ] += 1
+        return int(header[_VERSION])
+
+    def close(self):
+        """Release and unlink the shared blocks (after the workers have stopped)."""
+        self.header = self.indptr = self.neighbors = self.edge_ids = self.weights = None
+        for shm, _, _ in self._blocks.values():
+            shm.close()
+            shm.unlink()
+        self._blocks.clear()
+
+
+# ------------------------------
+# Worker process side
+# ------------------------------
+_shm: List[shared_memory.SharedMemory] = []
+_arrays: Dict[str, np.ndarray] = {}
+
+
+def _attach(spec: Dict[str, Tuple[str, tuple, str]]):
+    """Pool initializer: map the published arrays into this worker."""
+    for key, (name, shape, dtype) in spec.items():
+        shm = shared_memory.SharedMemory(name=name)
+        _shm.append(shm)   # keeps the mapping alive for the worker's lifetime
+        _arrays[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _dijkstra(src: int, dst: int) -> Tuple[List[int], List[int], float]:
+    indptr, neighbors, edge_ids, weights = (_arrays['indptr'], _arrays['neighbors'],
+                                            _arrays['edge_ids'], _arrays['weights'])
+    inf = float('inf')
+    dist = {src: 0.0}
+    parent = {src: (-1, -1)}
+    done = set()
+    heap = [(0.0, src)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if u in done:
+            continue
+        done.add(u)
+        if u == dst:
+            break
+        lo, hi = int(indptr[u]), int(indptr[u + 1])
+        eids = edge_ids[lo:hi]
+        for v, e, w in zip(neighbors[lo:hi].tolist(), eids.tolist(), weights[eids].tolist()):
+            if v in done or w == inf:
+                continue
+            nd = d + w
+            if nd < dist.get(v, inf):
+                dist[v] = nd
+                parent[v] = (u, e)
+                heapq.heappush(heap, (nd, v))
+
+    if dst not in done:
+        return [], [], inf
+    path, path_edges = [dst], []
+    while parent[path[-1]][0] != -1:
+        u, e = parent[path[-1]]
+        path.append(u)
+        path_edges.append(e)
+    return path[::-1], path_edges[::-1], dist[dst]
+
+
+def route_query(src: int, dst: int) -> Tuple[List[int], List[int], float, int]:
+    """
+    Least-cost route between node ids on the published weights
+
+    Returns:
+        tuple: (node ids, edge ids, cost, weights version); ([], [], inf, version) if unreachable
+    """
+    header = _arrays['header']
+    while True:
+        seq = int(header[_SEQ])
+        if seq & 1:
+            continue
+        version = int(header[_VERSION])
+        path, path_edges, cost = _dijkstra(src, dst)
+        # Weights were rewritten under us: the result may mix two versions
+        if int(header[_SEQ]) == seq:
+            return path, path_edges, cost, version
+
+
+class RouteWorkerPool:
+    def __init__(self, graph: SharedGraph, processes: int):
+        """
+        Args:
+            graph: Published graph the workers attach to
+            processes: Number of worker processes
+        """
+        self.processes = max(1, int(processes))
+        # Spawned, not forked: the serving process is multi-threaded
+        ctx = mp.get_context('spawn')
+        self._pool = ctx.Pool(self.processes, initializer=_attach, initargs=(graph.spec(),))
+        self.queries = 0
+
+    def route(self, src: int, dst: int, timeout: Optional[float] = None) -> Tuple[List[int], List[int], float, int]:
+        """Route between node ids on a worker; the calling thread waits without holding the GIL."""
+        self.queries += 1
+        return self._pool.apply_async(route_query, (src, dst)).get(timeout)
+
+    def stats(self) -> dict:
+        return {'processes': self.processes, 'queries': self.queries}
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
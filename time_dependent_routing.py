@@ -0,0 +1,126 @@
+"""
+Time-Dependent Routing
+Aggregates observed edge weights into per time-of-day bucket tables (one dense
+buckets x edges matrix) and answers shortest-path queries for a future departure,
+reading each edge's weight from the bucket in which it is reached.
+"""
+import heapq
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+SECONDS_PER_DAY = 24 * 3600
+
+
+def seconds_since_midnight(t: float) -> float:
+    """Local time-of-day of epoch time `t`, in seconds."""
+    lt = time.localtime(t)
+    return lt.tm_hour * 3600 + lt.tm_min * 60 + lt.tm_sec + (t % 1.0)
+
+
+def build_adjacency(n_nodes: int, edge_from: List[int], edge_to: List[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Undirected CSR adjacency over node/edge ids
+
+    Returns:
+        tuple: (indptr, neighbors, edge_ids); the neighbors of node u are
+               neighbors[indptr[u]:indptr[u + 1]], reached via edge_ids at the same slots
+    """
+    src = np.concatenate([edge_from, edge_to]).astype(np.int64)
+    dst = np.concatenate([edge_to, edge_from]).astype(np.int64)
+    eid = np.concatenate([np.arange(len(edge_from)), np.arange(len(edge_from))]).astype(np.int64)
+    order = np.argsort(src, kind='stable')
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n_nodes), out=indptr[1:])
+    return indptr, dst[order], eid[order]
+
+
+class TimeBucketedWeights:
+    def __init__(self, initial: np.ndarray, bucket_seconds: int = 900):
+        """
+        Args:
+            initial: Per-edge weights used for buckets with no history yet
+            bucket_seconds: Width of a time-of-day bucket (must divide a day)
+        """
+        if SECONDS_PER_DAY % bucket_seconds:
+            raise ValueError(f"bucket_seconds must divide {SECONDS_PER_DAY}, got {bucket_seconds}")
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = SECONDS_PER_DAY // bucket_seconds
+        n_edges = len(initial)
+        self._lock = threading.Lock()
+        self._sums = np.zeros((self.n_buckets, n_edges), dtype=np.float64)
+        self._samples = np.zeros(self.n_buckets, dtype=np.int64)
+        self._dirty = np.zeros(self.n_buckets, dtype=bool)
+        # Published table read by queries; rows are replaced, never edited in place
+        self.table = np.tile(np.asarray(initial, dtype=np.float64), (self.n_buckets, 1))
+
+    def bucket(self, t: float) -> int:
+        return int(seconds_since_midnight(t) // self.bucket_seconds) % self.n_buckets
+
+    def observe(self, weights: np.ndarray, t: Optional[float] = None):
+        """Accumulate one tick of per-edge weights into the bucket for time `t`."""
+        b = self.bucket(time.time() if t is None else t)
+        with self._lock:
+            self._sums[b] += weights
+            self._samples[b] += 1
+            self._dirty[b] = True
+
+    def rebuild(self) -> int:
+        """Recompute the mean weights of buckets observed since the last rebuild."""
+        with self._lock:
+            dirty = np.flatnonzero(self._dirty)
+            if dirty.size == 0:
+                return 0
+            rows = self._sums[dirty] / self._samples[dirty, None]
+            self._dirty[dirty] = False
+        table = self.table.copy()
+        table[dirty] = rows
+        self.table = table
+        return int(dirty.size)
+
+    def shortest_path(self, adjacency: Tuple[np.ndarray, np.ndarray, np.ndarray], src: int, dst: int,
+                      depart_at: float, seconds_per_weight: float) -> Tuple[List[int], float]:
+        """
+        Time-dependent Dijkstra from `src` to `dst` leaving at `depart_at`
+
+        Each edge costs the weight of the bucket in which it is entered, and
+        that weight times `seconds_per_weight` advances the clock.
+
+        Returns:
+            tuple: (node ids along the route, arrival epoch time); ([], inf) if unreachable
+        """
+        indptr, neighbors, edge_ids = adjacency
+        table = self.table
+        day_start = depart_at - seconds_since_midnight(depart_at)
+        bucket_seconds, n_buckets = self.bucket_seconds, self.n_buckets
+
+        arrival = {src: depart_at}
+        parent = {src: -1}
+        done = set()
+        heap = [(depart_at, src)]
+        while heap:
+            t, u = heapq.heappop(heap)
+            if u in done:
+                continue
+            done.add(u)
+            if u == dst:
+                break
+            row = table[int((t - day_start) // bucket_seconds) % n_buckets]
+            for slot in range(indptr[u], indptr[u + 1]):
+                v = int(neighbors[slot])
+                if v in done:
+                    continue
+                arrive = t + float(row[edge_ids[slot]]) * seconds_per_weight
+                if arrive < arrival.get(v, float('inf')):
+                    arrival[v] = arrive
+                    parent[v] = u
+                    heapq.heappush(heap, (arrive, v))
+
+        if dst not in done:
+            return [], float('inf')
+        path = [dst]
+        while parent[path[-1]] != -1:
+            path.append(parent[path[-1]])
+        return path[::-1], arrival[dst]
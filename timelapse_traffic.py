@@ -7,20 +7,27 @@ import os
 import time
 from pathlib import Path
 
+from capture_pool import VideoCapturePool, default_pool
+
 class TimelapseTrafficAnalyzer:
-    def __init__(self, video_folder='videos', frame_interval=30):
+    def __init__(self, video_folder='videos', frame_interval=30, max_open_decoders=None):
         """
         Initialize the time-lapse analyzer
         
         Args:
             video_folder: Folder containing time-lapse videos for each road segment
             frame_interval: Number of frames to skip between extractions (for speed)
+            max_open_decoders: Cap on open video decoders; None shares the
+                               process-wide capture pool
         """
         self.video_folder = video_folder
         self.frame_interval = frame_interval
-        self.video_captures = {}
-        self.current_frame_indices = {}
+        self.pool = default_pool() if max_open_decoders is None else VideoCapturePool(max_open_decoders)
+        self._owns_pool = max_open_decoders is not None
+        self.video_paths = {}
         self.total_frames = {}
+        # Segment name -> key in the pool, unique so other readers of the pool cannot collide
+        self._keys = {}
         
         # Create video folder if it doesn't exist
         os.makedirs(video_folder, exist_ok=True)
@@ -36,16 +43,27 @@ class TimelapseTrafficAnalyzer:
         print("Loading time-lapse videos...")
         for segment, video_path in video_mapping.items():
             if os.path.exists(video_path):
-                cap = cv2.VideoCapture(video_path)
-                if cap.isOpened():
-                    self.video_captures[segment] = cap
-                    self.current_frame_indices[segment] = 0
-                    self.total_frames[segment] = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                if segment in self._keys:
+                    self.pool.forget(self._keys.pop(segment))
+                key = self.pool.new_key(video_path)
+                # Decoders are opened lazily by the pool; registering only probes the file
+                if self.pool.register(key, video_path):
+                    self._keys[segment] = key
+                    self.video_paths[segment] = video_path
+                    self.total_frames[segment] = self.pool.frame_count(key)
                     print(f"  ✓ Loaded {segment}: {video_path} ({self.total_frames[segment]} frames)")
                 else:
+                    self.pool.forget(key)
+                    self._keys.pop(segment, None)
+                    self.video_paths.pop(segment, None)
                     print(f"  ✗ Failed to open {segment}: {video_path}")
             else:
                 print(f"  ✗ Video not found: {video_path}")
+
+    @property
+    def current_frame_indices(self):
+        """Next frame index per segment, as tracked by the capture pool"""
+        return {segment: self.pool.position(self._keys[segment]) for segment in self.video_paths}
                 
     def get_next_frame(self, segment):
         """
@@ -57,31 +75,11 @@ class TimelapseTrafficAnalyzer:
         Returns:
             frame: OpenCV image frame, or None if not available
         """
-        if segment not in self.video_captures:
+        if segment not in self.video_paths:
             return None
             
-        cap = self.video_captures[segment]
-        
-        # Set frame position
-        cap.set(cv2.CAP_PROP_POS_FRAMES, self.current_frame_indices[segment])
-        
-        ret, frame = cap.read()
-        
-        if ret:
-            # Move to next frame (with interval)
-            self.current_frame_indices[segment] += self.frame_interval
-            
-            # Loop back to start if we reached the end
-            if self.current_frame_indices[segment] >= self.total_frames[segment]:
-                self.current_frame_indices[segment] = 0
-                print(f"  {segment}: Looping video back to start")
-                
-            return frame
-        else:
-            # If read failed, reset to start
-            self.current_frame_indices[segment] = 0
-            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            return None
+        # The pool seeks, reads, advances by the interval and loops at the end
+        return self.pool.read_next(self._keys[segment], self.frame_interval)
             
     def count_vehicles_in_frame(self, frame):
         """
@@ -122,7 +120,10 @@ class TimelapseTrafficAnalyzer:
         """
         counts = {}
         
-        for segment in self.video_captures.keys():
+        # Read segments on already-open decoders first so reopens are amortized
+        segments = {self._keys[segment]: segment for segment in self.video_paths}
+        for key in self.pool.schedule(segments):
+            segment = segments[key]
             frame = self.get_next_frame(segment)
             count = self.count_vehicles_in_frame(frame)
             counts[segment] = count
@@ -138,17 +139,31 @@ class TimelapseTrafficAnalyzer:
         """
         os.makedirs(output_folder, exist_ok=True)
         
-        for segment in self.video_captures.keys():
+        for segment in self.video_paths.keys():
+            position = self.pool.position(self._keys[segment])
             frame = self.get_next_frame(segment)
             if frame is not None:
-                filename = f"{output_folder}/{segment}_frame_{self.current_frame_indices[segment]}.jpg"
+                filename = f"{output_folder}/{segment}_frame_{position}.jpg"
                 cv2.imwrite(filename, frame)
                 print(f"Saved: {filename}")
                 
+    def decoder_stats(self):
+        """
+        Capture pool metrics
+        
+        Returns:
+            dict: Open decoder count and cumulative opens/evictions/hits
+        """
+        return self.pool.stats()
+        
     def close(self):
         """Release all video captures"""
-        for cap in self.video_captures.values():
-            cap.release()
+        # On the shared pool, only decoders no other reader still uses are closed
+        for key in self._keys.values():
+            self.pool.forget(key, release=True)
+        self._keys.clear()
+        if self._owns_pool:
+            self.pool.close()
         print("All video captures released")
 
 
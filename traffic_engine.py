@@ -0,0 +1,447 @@
+"""
+Multi-Network Traffic Engine
+Serves several road networks from one process. A network is defined purely by
+config (graph, segment-to-source mapping and refresh policy); frame decoding and
+vehicle detection run on pools shared by every network.
+"""
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import networkx as nx
+import numpy as np
+from flask import Flask, abort, jsonify, request
+from flask_cors import CORS
+
+from capture_pool import default_pool
+from edge_smoothing import EdgeSmoother
+from traffic_core import (CITY_FRAME_INTERVALS, VideoSegment, build_city_grid, count_vehicles_from_frame,
+                          edge_key, schedule_segments)
+
+# Refresh policies
+REFRESH_STATIC = 'static'          # analyse once at startup (image networks)
+REFRESH_INTERVAL = 'interval'      # background refresh every refresh_seconds
+REFRESH_ON_REQUEST = 'on_request'  # refresh lazily when a stale network is queried
+
+DECODE_WORKERS = 4
+DETECT_WORKERS = 4
+
+
+# ------------------------------
+# Sources
+# ------------------------------
+
+class ImageSource:
+    """Static image; decoded once and reused on every refresh."""
+    def __init__(self, path: str):
+        self.path = path
+        self._frame = None
+        self._loaded = False
+
+    def read_frame(self):
+        if not self._loaded:
+            self._frame = cv2.imread(self.path)
+            self._loaded = True
+            if self._frame is None:
+                print(f"[WARN] Image file {self.path} not found or unreadable.")
+        return self._frame
+
+    def close(self):
+        self._frame = None
+
+
+class VideoSource:
+    """Video or time-lapse file sampled every `frame_interval` frames."""
+    def __init__(self, path: str, frame_interval: int = 30):
+        self.path = path
+        self.segment = VideoSegment(path, frame_interval)
+
+    def read_frame(self):
+        return self.segment.get_next_frame()
+
+    def close(self):
+        self.segment.close()
+
+
+SOURCE_TYPES: Dict[str, Callable] = {
+    'image': ImageSource,
+    'video': VideoSource,
+}
+
+
+def make_source(spec: dict):
+    """Build a source from a spec such as {'type': 'video', 'path': 'slow.mp4', 'frame_interval': 15}."""
+    kwargs = dict(spec)
+    kind = kwargs.pop('type')
+    if kind not in SOURCE_TYPES:
+        raise ValueError(f"Unknown source type: {kind}")
+    return SOURCE_TYPES[kind](**kwargs)
+
+
+# ------------------------------
+# Network config and state
+# ------------------------------
+
+class NetworkConfig:
+    """
+    Declarative description of one road network
+
+    Args:
+        name: URL name, served under /api/<name>/...
+        graph: Undirected graph; edges may carry a 'length' attribute
+        segments: Mapping of segment names to the (u, v) edge they measure
+        sources: Mapping of segment names to source specs (see make_source)
+        positions: Optional node -> (x, y) for frontend placement
+        refresh: One of REFRESH_STATIC, REFRESH_INTERVAL, REFRESH_ON_REQUEST
+        refresh_seconds: Refresh period for interval/on_request networks
+        smoothing: EMA factor on previous flow (0 uses the raw count)
+        forecast_weight: Share of the flow cost taken from the Holt forecast
+        alpha_length: Weight of road length in the edge cost
+        beta_flow: Weight of vehicle flow in the edge cost
+        default_route: Default (src, dst) for /graph_data
+    """
+    def __init__(self, name: str, graph: nx.Graph, segments: Dict[str, Tuple[str, str]],
+                 sources: Dict[str, dict], positions: Optional[Dict[str, Tuple[int, int]]] = None,
+                 refresh: str = REFRESH_INTERVAL, refresh_seconds: float = 2.0,
+                 smoothing: float = 0.0, forecast_weight: float = 0.0,
+                 alpha_length: float = 0.0, beta_flow: float = 1.0,
+                 default_route: Optional[Tuple[str, str]] = None):
+        if refresh not in (REFRESH_STATIC, REFRESH_INTERVAL, REFRESH_ON_REQUEST):
+            raise ValueError(f"Unknown refresh policy: {refresh}")
+        self.name = name
+        self.graph = graph
+        self.segments = segments
+        self.sources = sources
+        self.positions = positions or {}
+        self.refresh = refresh
+        self.refresh_seconds = refresh_seconds
+        self.smoothing = smoothing
+        self.forecast_weight = forecast_weight
+        self.alpha_length = alpha_length
+        self.beta_flow = beta_flow
+        nodes = list(graph.nodes())
+        self.default_route = default_route or ((nodes[0], nodes[-1]) if nodes else ('', ''))
+
+
+class NetworkState:
+    """Live per-edge counts and weights for one configured network."""
+    def __init__(self, config: NetworkConfig):
+        self.config = config
+        self.graph = config.graph
+        self.lock = threading.Lock()
+        self.sources = {seg: make_source(spec) for seg, spec in config.sources.items()}
+        self.edge_index = {edge_key(u, v): i for i, (u, v) in enumerate(self.graph.edges())}
+        self.edge_length = np.array([d.get('length', 1.0) for _, _, d in self.graph.edges(data=True)])
+        self.smoother = EdgeSmoother(len(self.edge_index), config.smoothing, initial=0.0)
+        self.segment_index = {seg: self.edge_index[edge_key(*edge)] for seg, edge in config.segments.items()}
+        self.last_update = 0.0
+        self._refreshing = threading.Lock()
+        self._update_weights()
+
+    def apply_counts(self, counts: Dict[str, int]):
+        """Fold per-segment counts into edge flow and recompute weights."""
+        index = np.array([self.segment_index[seg] for seg in counts], dtype=np.int64)
+        with self.lock:
+            self.smoother.update(np.array(list(counts.values())), index)
+            self._update_weights()
+            self.last_update = time.time()
+
+    def try_begin_refresh(self) -> bool:
+        """Claim this network for one refresh; False if a refresh is already running."""
+        return self._refreshing.acquire(blocking=False)
+
+    def end_refresh(self):
+        self._refreshing.release()
+
+    def _update_weights(self):
+        cfg = self.config
+        weights = cfg.alpha_length * self.edge_length + cfg.beta_flow * self.smoother.cost(cfg.forecast_weight)
+        for w, (_, _, d) in zip(weights.tolist(), self.graph.edges(data=True)):
+            d['weight'] = w
+
+    def is_stale(self) -> bool:
+        if self.config.refresh == REFRESH_STATIC:
+            return self.last_update == 0.0
+        return time.time() - self.last_update >= self.config.refresh_seconds
+
+    def close(self):
+        for source in self.sources.values():
+            source.close()
+
+
+# ------------------------------
+# Engine
+# ------------------------------
+
+class TrafficEngine:
+    """Hosts many networks on shared decode and detector pools."""
+    def __init__(self, decode_workers: int = DECODE_WORKERS, detect_workers: int = DETECT_WORKERS):
+        self.networks: Dict[str, NetworkState] = {}
+        self.decode_pool = ThreadPoolExecutor(max_workers=decode_workers, thread_name_prefix='decode')
+        self.detect_pool = ThreadPoolExecutor(max_workers=detect_workers, thread_name_prefix='detect')
+        self._stop = threading.Event()
+
+    def add_network(self, config: NetworkConfig) -> NetworkState:
+        if config.name in self.networks:
+            raise ValueError(f"Network already registered: {config.name}")
+        state = NetworkState(config)
+        self.networks[config.name] = state
+        return state
+
+    def refresh(self, state: NetworkState):
+        """Decode one frame per segment and count vehicles on the shared pools."""
+        # One refresh per network at a time; sources are not thread-safe
+        if not state.try_begin_refresh():
+            return
+        try:
+            # Submit segments on already-open decoders first to amortize reopens
+            order = schedule_segments({seg: getattr(src, 'segment', src) for seg, src in state.sources.items()})
+            frames = {seg: self.decode_pool.submit(state.sources[seg].read_frame) for seg in order}
+            counts = {seg: self.detect_pool.submit(count_vehicles_from_frame, f.result())
+                      for seg, f in frames.items()}
+            state.apply_counts({seg: f.result() for seg, f in counts.items()})
+        finally:
+            state.end_refresh()
+
+    def ensure_fresh(self, state: NetworkState):
+        if state.config.refresh != REFRESH_INTERVAL and state.is_stale():
+            self.refresh(state)
+
+    def _interval_worker(self, state: NetworkState):
+        while not self._stop.is_set():
+            self.refresh(state)
+            self._stop.wait(state.config.refresh_seconds)
+
+    def start(self):
+        """Run the initial analysis and start background refreshers."""
+        for state in self.networks.values():
+            if state.config.refresh == REFRESH_INTERVAL:
+                threading.Thread(target=self._interval_worker, args=(state,), daemon=True).start()
+            else:
+                self.refresh(state)
+
+    def close(self):
+        self._stop.set()
+        self.decode_pool.shutdown(wait=False)
+        self.detect_pool.shutdown(wait=False)
+        for state in self.networks.values():
+            state.close()
+
+
+def graph_payload(state: NetworkState, src: str, dst: str) -> dict:
+    """Build the /graph_data response for one network."""
+    cfg = state.config
+    with state.lock:
+        G = state.graph
+        weights: List[float] = [d['weight'] for _, _, d in G.edges(data=True)]
+        nodes = []
+        for n in G.nodes():
+            node = {'id': n, 'label': n}
+            if n in cfg.positions:
+                node['x'], node['y'] = cfg.positions[n]
+            nodes.append(node)
+        edges = []
+        counts = state.smoother.last_count.tolist()
+        for i, (u, v, d) in enumerate(G.edges(data=True)):
+            edges.append({
+                'from': u,
+                'to': v,
+                'weight': float(d['weight']),
+                'count': counts[i],
+                'label': str(counts[i])
+            })
+        try:
+            if src not in G or dst not in G:
+                raise nx.NodeNotFound("invalid src/dst")
+            best_route = nx.shortest_path(G, source=src, target=dst, weight='weight')
+        except Exception:
+            best_route = []
+        last_update = state.last_update
+
+    next_update = 0
+    if cfg.refresh != REFRESH_STATIC:
+        next_update = max(0, int(cfg.refresh_seconds - (time.time() - last_update)))
+    return {
+        'network': cfg.name,
+        'nodes': nodes,
+        'edges': edges,
+        'best_route': best_route,
+        'min_weight': float(min(weights)) if weights else 0.0,
+        'max_weight': float(max(weights)) if weights else 1.0,
+        'src': src,
+        'dst': dst,
+        'timestamp': last_update,
+        'next_update': next_update
+    }
+
+
+def create_app(engine: TrafficEngine) -> Flask:
+    app = Flask(__name__)
+    CORS(app)
+
+    def get_network(name: str) -> NetworkState:
+        state = engine.networks.get(name)
+        if state is None:
+            abort(404, description=f"Unknown network: {name}")
+        return state
+
+    @app.route('/api/networks')
+    def api_networks():
+        return jsonify([{
+            'name': name,
+            'nodes': state.graph.number_of_nodes(),
+            'edges': state.graph.number_of_edges(),
+            'refresh': state.config.refresh,
+            'refresh_seconds': state.config.refresh_seconds,
+            'last_update': state.last_update
+        } for name, state in engine.networks.items()])
+
+    @app.route('/api/metrics')
+    def api_metrics():
+        return jsonify({
+            'decoders': default_pool().stats()
+        })
+
+    @app.route('/api/<network>/graph_data')
+    def api_graph_data(network):
+        state = get_network(network)
+        engine.ensure_fresh(state)
+        default_src, default_dst = state.config.default_route
+        src = request.args.get('src', default_src)
+        dst = request.args.get('dst', default_dst)
+        return jsonify(graph_payload(state, src, dst))
+
+    return app
+
+
+# ------------------------------
+# Built-in networks (mirroring the standalone entry points)
+# ------------------------------
+
+CORRIDOR_SEGMENTS = {
+    'Start_R1': ('Start', 'R1'),
+    'R1_R2': ('R1', 'R2'),
+    'R2_R3': ('R2', 'R3'),
+    'R3_R4': ('R3', 'R4'),
+    'R4_End': ('R4', 'End'),
+    'U1_R1': ('U1', 'R1'),
+    'U1_R2': ('U1', 'R2'),
+    'U2_R3': ('U2', 'R3'),
+    'U2_R4': ('U2', 'R4'),
+    'L1_R1': ('L1', 'R1'),
+    'L1_R2': ('L1', 'R2'),
+    'L2_R3': ('L2', 'R3'),
+    'L2_R4': ('L2', 'R4'),
+    'L1_L2': ('L1', 'L2'),
+    'U1_U2': ('U1', 'U2'),
+}
+
+CORRIDOR_IMAGES = {
+    'Start_R1': 'images/Start_r1.png',
+    'R1_R2': 'images/r1_r2.png',
+    'R2_R3': 'images/r2_r3.png',
+    'R3_R4': 'images/r3_r4.png',
+    'R4_End': 'images/r4_end.png',
+    'U1_R1': 'images/u1_r1.png',
+    'U1_R2': 'images/u1_r2.png',
+    'U2_R3': 'images/u2_r3.png',
+    'U2_R4': 'images/u2_r4.png',
+    'L1_R1': 'images/l1_r1.png',
+    'L1_R2': 'images/l1_r2.png',
+    'L2_R3': 'images/l2_r3.png',
+    'L2_R4': 'images/l2_r4.png',
+    'L1_L2': 'images/l1-l2.jpg',
+    'U1_U2': 'images/u1_u2.png',
+}
+
+HYBRID_INTERVALS = {
+    'Start_R1': 15, 'R1_R2': 25, 'R2_R3': 5, 'R3_R4': 35, 'R4_End': 10,
+    'U1_R1': 11, 'U1_R2': 12, 'U2_R3': 13, 'U2_R4': 14, 'L1_R1': 15,
+    'L1_R2': 16, 'L2_R3': 17, 'L2_R4': 18, 'L1_L2': 19, 'U1_U2': 20,
+}
+
+
+def corridor_graph() -> nx.Graph:
+    G = nx.Graph()
+    G.add_nodes_from(['Start', 'R1', 'R2', 'R3', 'R4', 'End', 'U1', 'U2', 'L1', 'L2'])
+    G.add_edges_from(CORRIDOR_SEGMENTS.values())
+    return G
+
+
+def images_network() -> NetworkConfig:
+    """Static images (traffic_project.py)."""
+    return NetworkConfig(
+        'images', corridor_graph(), CORRIDOR_SEGMENTS,
+        {seg: {'type': 'image', 'path': path} for seg, path in CORRIDOR_IMAGES.items()},
+        refresh=REFRESH_STATIC, default_route=('Start', 'End'))
+
+
+def hybrid_network() -> NetworkConfig:
+    """One shared video sampled at per-segment intervals (traffic_project_hybrid.py)."""
+    return NetworkConfig(
+        'hybrid', corridor_graph(), CORRIDOR_SEGMENTS,
+        {seg: {'type': 'video', 'path': 'slow.mp4', 'frame_interval': n} for seg, n in HYBRID_INTERVALS.items()},
+        refresh=REFRESH_ON_REQUEST, refresh_seconds=2, default_route=('Start', 'End'))
+
+
+def timelapse_network() -> NetworkConfig:
+    """One time-lapse video per segment (traffic_project_timelapse.py)."""
+    return NetworkConfig(
+        'timelapse', corridor_graph(), CORRIDOR_SEGMENTS,
+        {seg: {'type': 'video', 'path': os.path.join('videos', f"{seg.lower()}_timelapse.mp4"), 'frame_interval': 30}
+         for seg in CORRIDOR_SEGMENTS},
+        refresh=REFRESH_ON_REQUEST, refresh_seconds=5, default_route=('Start', 'End'))
+
+
+def city_network() -> NetworkConfig:
+    """30-junction city grid, weighted as in python_project_hybrid.py."""
+    G, positions = build_city_grid()
+    intervals = CITY_FRAME_INTERVALS
+    segments, sources = {}, {}
+    for i, (u, v) in enumerate(G.edges()):
+        seg = '_'.join(edge_key(u, v))
+        segments[seg] = (u, v)
+        sources[seg] = {'type': 'video', 'path': 'slow.mp4', 'frame_interval': intervals[i % len(intervals)]}
+    return NetworkConfig(
+        'city', G, segments, sources, positions=positions,
+        refresh=REFRESH_INTERVAL, refresh_seconds=2, smoothing=0.6, forecast_weight=0.0,
+        alpha_length=0.3, beta_flow=1.0, default_route=('J1', 'J30'))
+
+
+BUILTIN_NETWORKS: Dict[str, Callable[[], NetworkConfig]] = {
+    'images': images_network,
+    'hybrid': hybrid_network,
+    'timelapse': timelapse_network,
+    'city': city_network,
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve several traffic networks from one process')
+    parser.add_argument('--networks', default=','.join(BUILTIN_NETWORKS),
+                        help=f"comma-separated subset of: {', '.join(BUILTIN_NETWORKS)}")
+    parser.add_argument('--decode-workers', type=int, default=DECODE_WORKERS)
+    parser.add_argument('--detect-workers', type=int, default=DETECT_WORKERS)
+    parser.add_argument('--max-decoders', type=int, default=default_pool().max_open,
+                        help='cap on simultaneously open video decoders')
+    parser.add_argument('--port', type=int, default=5000)
+    args = parser.parse_args()
+
+    default_pool().max_open = max(1, args.max_decoders)
+    engine = TrafficEngine(args.decode_workers, args.detect_workers)
+    for name in args.networks.split(','):
+        engine.add_network(BUILTIN_NETWORKS[name.strip()]())
+    engine.start()
+
+    app = create_app(engine)
+    print(f"Traffic engine running at http://127.0.0.1:{args.port}")
+    for name in engine.networks:
+        print(f"Endpoint: GET /api/{name}/graph_data")
+    try:
+        app.run(host='127.0.0.1', port=args.port)
+    finally:
+        engine.close()
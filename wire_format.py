@@ -0,0 +1,75 @@
+"""
+Compact Wire Format
+Content negotiation for graph payloads: JSON or MessagePack chosen by the
+Accept header, compressed with brotli or gzip per Accept-Encoding.
+"""
+import gzip
+import json
+from typing import Optional
+
+from flask import Response, request
+
+try:
+    import msgpack
+except ImportError:  # optional; JSON is always available
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+JSON_TYPE = 'application/json'
+MSGPACK_TYPES = ('application/msgpack', 'application/x-msgpack')
+COMPRESS_MIN_BYTES = 512   # smaller bodies are not worth compressing
+
+
+def _negotiate_type() -> str:
+    offered = [JSON_TYPE] + (list(MSGPACK_TYPES) if msgpack is not None else [])
+    return request.accept_mimetypes.best_match(offered, default=JSON_TYPE)
+
+
+def _negotiate_encoding() -> Optional[str]:
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def encode_response(payload: dict, cache_control: Optional[str] = None, etag: Optional[str] = None) -> Response:
+    """
+    Serialize a payload for the current request
+
+    Args:
+        payload: JSON-compatible dict
+        cache_control: Optional Cache-Control header value
+        etag: Optional entity tag; a matching If-None-Match yields 304
+
+    Returns:
+        Response: Encoded (and possibly compressed) response
+    """
+    mimetype = _negotiate_type()
+    if mimetype in MSGPACK_TYPES:
+        body = msgpack.packb(payload, use_bin_type=True)
+    else:
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+    encoding = _negotiate_encoding() if len(body) >= COMPRESS_MIN_BYTES else None
+    if encoding == 'br':
+        body = brotli.compress(body)
+    elif encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=6)
+
+    resp = Response(body, mimetype=mimetype)
+    if encoding:
+        resp.headers['Content-Encoding'] = encoding
+    resp.headers['Vary'] = 'Accept, Accept-Encoding'
+    if cache_control:
+        resp.headers['Cache-Control'] = cache_control
+    if etag:
+        # Weak: the representation differs per negotiated type/encoding
+        resp.set_etag(etag, weak=True)
+        resp.make_conditional(request)
+    return resp